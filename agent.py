@@ -15,18 +15,30 @@
 # =======================================================
 
 from langchain.agents import create_agent
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.agents.middleware import AgentState 
-from langchain.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.tools import StructuredTool
 from dotenv import load_dotenv
-from faster_whisper import WhisperModel
 from typing import Literal
-import os, time, requests
+from pydantic import BaseModel
+import numpy as np
+import os, time, threading
+
+# Heavy models (Whisper, Gemini) are imported and loaded lazily, once per process
+from model_registry import get_stt_model, get_stt_service, get_stt_cascade, get_chat_model
 
 # Middleware
 from middleware.speechToTextMiddleware import SpeechToTextMiddleware
 from middleware.textToSpeechMiddleware import TextToSpeechMiddleware
+from middleware.intentRouterMiddleware import IntentRouterMiddleware
+from middleware.responseCacheMiddleware import ResponseCacheMiddleware
+from middleware.tracingMiddleware import TracingMiddleware
+from middleware.historyTrimMiddleware import HistoryTrimMiddleware
+from stt.streaming_transcriber import StreamingTranscriber
+from stt.vad import VoiceActivityTrimmer
+from tts.tts_cache import load_tts_cache
+from tts.backends import load_tts_backend
+from persistence.sqlite_checkpointer import load_checkpointer
+from iot.led_client import LedClient, LedServerError
 
 
 # =====================
@@ -35,7 +47,27 @@ from middleware.textToSpeechMiddleware import TextToSpeechMiddleware
 load_dotenv()
 
 LED_API_URL = os.getenv("LED_API_BASE_URL", "http://127.0.0.1:8000/led")
+# Upper bound for one LED command, retries included
+LED_API_BUDGET = float(os.getenv("LED_API_BUDGET_S", "1.5"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# Recorders hand float32 samples to the agent instead of writing a WAV file
+AUDIO_IN_MEMORY = os.getenv("AUDIO_IN_MEMORY", "false").lower() == "true"
+# Speak the answer sentence by sentence while Gemini is still generating it
+TTS_STREAMING = os.getenv("TTS_STREAMING", "false").lower() == "true"
+# Concurrent utterances share one batched Whisper decode
+WHISPER_BATCHING = os.getenv("WHISPER_BATCHING", "false").lower() == "true"
+# A fast Whisper model first, WHISPER_MODEL only for the low-confidence segments ("" disables it)
+WHISPER_CASCADE = bool(os.getenv("WHISPER_CASCADE_MODEL", ""))
+# Whisper beam search width, 1 is greedy decoding (faster, a bit less accurate)
+WHISPER_BEAM_SIZE = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+# Simple LED commands are answered locally, without a Gemini round-trip
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "true").lower() == "true"
+# Repeated commands replay the tool plan and the answer of an earlier turn (same words, same LED state)
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "false").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_MAX = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+# Only the last turns stay in the conversation (and in every checkpoint), 0 keeps them all
+HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "20"))
 
 if not GEMINI_API_KEY:
     raise ValueError("❌ GEMINI_API_KEY not found. Check your .env file.")
@@ -45,62 +77,175 @@ if not GEMINI_API_KEY:
 #  STATE DEFINITION
 # =====================
 class VoiceState(AgentState):
-    audio_input: str | None = None
+    audio_input: str | np.ndarray | None = None
     audio_output: str | None = None
+    text_input: str | None = None
 
 
 # =====================
 #  TOOLS
 # =====================
-@tool
-def control_led(color: Literal["red", "blue"], status: Literal["high", "low"]) -> str:
-    """Controls the state (on/off) and color of a physical LED."""
-    url = LED_API_URL
+led_client = LedClient(LED_API_URL, budget=LED_API_BUDGET)
+
+
+class LedAction(BaseModel):
+    color: Literal["red", "blue"]
+    status: Literal["high", "low"]
+
+
+def _led_payload(actions) -> list[dict]:
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    return [{"timestamp": timestamp, "color": color, "status": status} for color, status in actions]
+
+
+def _control_led(color: Literal["red", "blue"], status: Literal["high", "low"]) -> str:
+    """Controls the state (on/off) and color of a physical LED."""
+    try:
+        led_client.post(_led_payload([(color, status)]))
+        return f"LED '{color}' set to '{status}' successfully..."
+    except (LedServerError, ValueError) as e:
+        return f"ERROR: Could not control the LED. Details: {e}"
+
 
-    payload = [{"timestamp": timestamp, "color": color, "status": status}]
-    
+async def _acontrol_led(color: Literal["red", "blue"], status: Literal["high", "low"]) -> str:
+    """Controls the state (on/off) and color of a physical LED."""
     try:
-        response = requests.post(url, json=payload, timeout=5)
-        response.raise_for_status()
+        await led_client.apost(_led_payload([(color, status)]))
         return f"LED '{color}' set to '{status}' successfully..."
-    except requests.exceptions.RequestException as e:
+    except (LedServerError, ValueError) as e:
         return f"ERROR: Could not control the LED. Details: {e}"
 
 
+def _set_leds_report(actions: list[LedAction], answer: dict) -> str:
+    """One line per action from the server `results` array (same order as the commands)."""
+    results = answer.get("results", []) if isinstance(answer, dict) else []
+    lines = []
+    for i, action in enumerate(actions):
+        if i < len(results):
+            result = results[i]
+            lines.append(f"LED '{action.color}': {result.get('status')} ({result.get('message')})")
+        else:
+            lines.append(f"LED '{action.color}': no result from the server")
+    return "\n".join(lines)
+
+
+def _set_leds(actions: list[LedAction]) -> str:
+    """Sets several LEDs in one call, e.g. everything off. Use it whenever more than one LED changes."""
+    try:
+        answer = led_client.post(_led_payload((a.color, a.status) for a in actions))
+        return _set_leds_report(actions, answer)
+    except (LedServerError, ValueError) as e:
+        return f"ERROR: Could not control the LEDs. Details: {e}"
+
+
+async def _aset_leds(actions: list[LedAction]) -> str:
+    """Sets several LEDs in one call, e.g. everything off. Use it whenever more than one LED changes."""
+    try:
+        answer = await led_client.apost(_led_payload((a.color, a.status) for a in actions))
+        return _set_leds_report(actions, answer)
+    except (LedServerError, ValueError) as e:
+        return f"ERROR: Could not control the LEDs. Details: {e}"
+
+
+def _led_state_report(answer: dict) -> str:
+    leds = answer.get("leds", {})
+    return "\n".join(f"LED '{color}': {led['effect'] + ' effect' if led.get('effect') else led.get('status')}"
+                     for color, led in leds.items())
+
+
+def _get_led_state() -> str:
+    """Reads the current state (on, off or running effect) of every LED."""
+    try:
+        return _led_state_report(led_client.state())
+    except (LedServerError, ValueError) as e:
+        return f"ERROR: Could not read the LED state. Details: {e}"
+
+
+async def _aget_led_state() -> str:
+    """Reads the current state (on, off or running effect) of every LED."""
+    try:
+        return _led_state_report(await led_client.astate())
+    except (LedServerError, ValueError) as e:
+        return f"ERROR: Could not read the LED state. Details: {e}"
+
+
+# Same tools for invoke (pooled requests session) and ainvoke (pooled httpx client, no thread blocked)
+control_led = StructuredTool.from_function(func=_control_led, coroutine=_acontrol_led, name="control_led")
+# One request and one tool call for multi-LED commands
+set_leds = StructuredTool.from_function(func=_set_leds, coroutine=_aset_leds, name="set_leds")
+get_led_state = StructuredTool.from_function(func=_get_led_state, coroutine=_aget_led_state, name="get_led_state")
+
+
 # =====================
 #  STT MODEL
 # =====================
 def load_stt_model():
-    stt_model_name = os.getenv("WHISPER_MODEL", "small")
-    stt_device = os.getenv("WHISPER_DEVICE", "cpu")
-    stt_compute_type = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+    """Returns the shared Whisper model (WHISPER_* settings), loaded on first use."""
+    return get_stt_model()
+
 
-    model = WhisperModel(stt_model_name, device=stt_device, compute_type=stt_compute_type)
-    print(f"Whisper model loaded {stt_model_name} on {stt_device} ({stt_compute_type})")
-    return model
+def load_streaming_transcriber(stt_model):
+    """Returns a StreamingTranscriber when WHISPER_STREAMING is enabled, None otherwise."""
+    if os.getenv("WHISPER_STREAMING", "false").lower() != "true":
+        return None
+    window = float(os.getenv("WHISPER_STREAM_WINDOW", "5"))
+    print(f"Whisper streaming enabled ({window}s windows)")
+    return StreamingTranscriber(stt_model, window_seconds=window, beam_size=WHISPER_BEAM_SIZE, vad=load_vad())
+
+
+def load_vad():
+    """Returns a VoiceActivityTrimmer configured by VAD_AGGRESSIVENESS (0-3, "off" disables it)."""
+    aggressiveness = os.getenv("VAD_AGGRESSIVENESS", "1").lower()
+    if aggressiveness in ("", "off", "none"):
+        return None
+    return VoiceActivityTrimmer(aggressiveness=int(aggressiveness))
+
+
+def load_speech_to_text(stt_model=None) -> SpeechToTextMiddleware:
+    """
+    Returns the STT stage of the agent (WHISPER_* and VAD settings). robot_main also calls its
+    speech_to_text() on its own worker, so the next utterance is decoded while the agent runs.
+    """
+    if stt_model is None:
+        if WHISPER_BATCHING:
+            stt_model = get_stt_service()
+        elif WHISPER_CASCADE:
+            stt_model = get_stt_cascade()
+        else:
+            stt_model = load_stt_model()
+    return SpeechToTextMiddleware(stt_model, vad=load_vad(), beam_size=WHISPER_BEAM_SIZE)
 
 
 # =====================
 #  AGENT FACTORY
 # =====================
-def create_voice_agent():
-    """Builds and returns the voice-enabled agent instance."""
-    stt_model = load_stt_model()
-    checkpointer = InMemorySaver()
+def create_voice_agent(stt_model=None, speak=True, checkpointer=None, chat_model=None):
+    """
+    Builds and returns the voice-enabled agent instance.
+    With speak=False the answer is not played on this host (e.g. the gateway sends it back to the device).
+    The checkpointer defaults to CHECKPOINT_DB (see persistence/sqlite_checkpointer.py),
+    the chat model to the shared Gemini client (benchmarks pass a fake one).
+    """
+    if checkpointer is None:
+        checkpointer = load_checkpointer()
+
+    middleware = [load_speech_to_text(stt_model)]
+    if HISTORY_MAX_TURNS:
+        middleware.append(HistoryTrimMiddleware(max_turns=HISTORY_MAX_TURNS)) # after the new HumanMessage is added
+    if INTENT_ROUTER:
+        middleware.append(IntentRouterMiddleware())
+    if RESPONSE_CACHE:
+        middleware.append(ResponseCacheMiddleware(led_client.state, led_client.astate,
+                                                  ttl_seconds=RESPONSE_CACHE_TTL, max_entries=RESPONSE_CACHE_MAX))
+    if speak:
+        middleware.append(TextToSpeechMiddleware(backend=load_tts_backend(), cache=load_tts_cache(), streaming=TTS_STREAMING))
+    middleware.append(TracingMiddleware()) # innermost: times the real LLM and tool calls
 
     agent = create_agent(
         system_prompt="You are Little Jhon, a robot assistant for smart home and IoT devices.",
-        model=ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=GEMINI_API_KEY,
-            temperature=0
-        ),
-        tools=[control_led],
-        middleware=[
-            SpeechToTextMiddleware(stt_model),
-            TextToSpeechMiddleware()
-        ],
+        model=chat_model or get_chat_model("gemini-2.5-flash", temperature=0),
+        tools=[control_led, set_leds, get_led_state],
+        middleware=middleware,
         checkpointer=checkpointer
     )
 
@@ -110,11 +255,31 @@ def create_voice_agent():
 # =====================
 #  EXPORTS
 # =====================
-agent = create_voice_agent()
+_agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent():
+    """Returns the process-wide agent, built on first use."""
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            _agent = create_voice_agent()
+        return _agent
+
+
+def __getattr__(name):
+    # `from agent import agent` keeps working, but the agent is no longer built at import time
+    if name == "agent":
+        return get_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 config = {"configurable": {"thread_id": "1"}}
 
 # =====================
 #  OPTIONAL ENTRYPOINT
 # =====================
 if __name__ == "__main__":
+    get_agent()
     print("✅ Agent ready and loaded.")
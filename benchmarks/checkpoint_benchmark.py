@@ -0,0 +1,109 @@
+# =======================================================
+# File: benchmarks/checkpoint_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Checkpoint write latency per turn and storage growth of the checkpointers:
+#              InMemorySaver, plain SqliteSaver and RetentionSqliteSaver, with and without
+#              the history trimmed to the last turns (HistoryTrimMiddleware).
+#              Turns run through a real agent graph with a fake chat model (no API calls).
+# Usage:
+#               uv run python -m benchmarks.checkpoint_benchmark [--turns 500] [--keep-last 20] [--history-turns 20] [--json]
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from benchmarks.fakes import FakeChatModel
+from middleware.historyTrimMiddleware import HistoryTrimMiddleware
+from persistence.sqlite_checkpointer import RetentionSqliteSaver
+from telemetry.tracing import percentile
+
+
+def timed_writes(saver, timings: list):
+    """Wraps put/put_writes of a saver instance, adding their time to the current turn."""
+    for name in ("put", "put_writes"):
+        method = getattr(saver, name)
+
+        def wrapper(*args, _method=method, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                timings[-1] += time.perf_counter() - start
+
+        setattr(saver, name, wrapper)
+
+
+def run(name, saver, turns, db_path=None, history_turns=0) -> dict:
+    # A distinct message per turn: one shared object keeps its id and add_messages would replace it
+    replies = [AIMessage(content=f"The kitchen light is on, anything else? ({turn})") for turn in range(turns)]
+    middleware = [HistoryTrimMiddleware(max_turns=history_turns)] if history_turns else []
+    agent = create_agent(model=FakeChatModel(responses=replies), tools=[], middleware=middleware, checkpointer=saver)
+    config = {"configurable": {"thread_id": "benchmark"}}
+    timings = []
+    timed_writes(saver, timings)
+
+    for turn in range(turns):
+        timings.append(0.0)
+        agent.invoke({"messages": [HumanMessage(content=f"Turn on the kitchen light, turn {turn}")]}, config)
+
+    ms = sorted(t * 1000 for t in timings)
+    result = {
+        "checkpointer": name,
+        "turns": turns,
+        "write_ms_p50": percentile(ms, 0.50),
+        "write_ms_p95": percentile(ms, 0.95),
+        "write_ms_max": ms[-1],
+        "checkpoints_stored": len(list(saver.list(config))),
+    }
+    if db_path:
+        saver.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        result["db_bytes"] = os.path.getsize(db_path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint write latency benchmark")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--keep-last", type=int, default=20)
+    parser.add_argument("--history-turns", type=int, default=20, help="turns kept by HistoryTrimMiddleware")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = os.path.join(tmp, "plain.sqlite")
+        retention_path = os.path.join(tmp, "retention.sqlite")
+        trimmed_path = os.path.join(tmp, "trimmed.sqlite")
+        results = [
+            run("memory", InMemorySaver(), args.turns),
+            run("sqlite", SqliteSaver(sqlite3.connect(plain_path, check_same_thread=False)), args.turns, plain_path),
+            run(f"sqlite_keep_{args.keep_last}", RetentionSqliteSaver.from_path(retention_path, keep_last=args.keep_last),
+                args.turns, retention_path),
+            run(f"sqlite_keep_{args.keep_last}_trim_{args.history_turns}",
+                RetentionSqliteSaver.from_path(trimmed_path, keep_last=args.keep_last),
+                args.turns, trimmed_path, history_turns=args.history_turns),
+        ]
+
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+        else:
+            size = f", {result['db_bytes'] / 1024:.0f} KB on disk" if "db_bytes" in result else ""
+            print(f"{result['checkpointer']:>24}: p50 {result['write_ms_p50']:.2f} ms, "
+                  f"p95 {result['write_ms_p95']:.2f} ms, max {result['write_ms_max']:.2f} ms per turn, "
+                  f"{result['checkpoints_stored']} checkpoints{size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# =======================================================
+# File: benchmarks/fakes.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Offline stand-ins used by the benchmarks: a scripted chat model, a null
+#              audio sink and a stub LED server, so no API key, speaker or Raspberry Pi is needed.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+import json
+import threading
+
+
+class FakeChatModel(FakeMessagesListChatModel):
+    """Answers with the scripted `responses` in a loop, tools are accepted and ignored."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+class NullMusic:
+    """pygame.mixer.music stand-in: every file finishes as soon as it is loaded."""
+
+    def load(self, path):
+        pass
+
+    def play(self):
+        pass
+
+    def get_busy(self):
+        return False
+
+    def stop(self):
+        pass
+
+    def unload(self):
+        pass
+
+
+class _StubLedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive, like the real server
+
+    def do_POST(self):
+        commands = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"[]")
+        results = [{"color": c.get("color"), "status": "ON" if c.get("status") == "high" else "OFF", "message": "Success"}
+                   for c in commands]
+        self._send({"status": "completed", "results": results})
+
+    def do_GET(self):
+        self._send({"version": 1, "leds": {"red": {"status": "off", "effect": None}, "blue": {"status": "off", "effect": None}}})
+
+    def _send(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_led_server() -> str:
+    """Starts the stub LED server on a free local port, returns its /led URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubLedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/led"
@@ -0,0 +1,130 @@
+# =======================================================
+# File: benchmarks/led_server_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Load test of the LED server on an ordinary Linux box: the server runs in a
+#              subprocess with the gpiozero mock pin factory, POST /led is driven with
+#              configurable concurrency and batch sizes.
+#              Reports throughput, p50/p95/p99 latency and error rate for every configuration.
+# Usage:
+#               uv run python -m benchmarks.led_server_benchmark [--concurrency 1,8,32] [--batch 1,8] [--seconds 5] [--json]
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from telemetry.tracing import percentile
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server_led")
+# Runs in the server process, output is discarded (the server prints every command)
+SERVER = "import sys, led_server_microdot_raspy as server; server.app.run(host='127.0.0.1', port=int(sys.argv[1]))"
+
+
+def start_server(port) -> subprocess.Popen:
+    env = dict(os.environ, GPIOZERO_PIN_FACTORY="mock", GPIOZERO_MOCK_PIN_CLASS="mockpwmpin")
+    server = subprocess.Popen([sys.executable, "-c", SERVER, str(port)], cwd=SERVER_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"LED server failed to start:\n{server.stderr.read().decode()}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/led/state", timeout=0.5)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("LED server did not answer within 15 s")
+
+
+async def load(url, concurrency, batch_size, seconds) -> dict:
+    """`concurrency` clients send batches back to back for `seconds`; statuses alternate so the GPIO is really written."""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def client_loop(client, worker):
+        nonlocal errors
+        i = 0
+        while time.perf_counter() < deadline:
+            status = "high" if (i + worker) % 2 else "low"
+            commands = [{"color": ("red", "blue")[j % 2], "status": status} for j in range(batch_size)]
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=commands)
+                ok = response.status_code == 200 and len(response.json().get("results", [])) == batch_size
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+            i += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=10) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, worker) for worker in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "requests": len(ms),
+        "requests_per_s": len(ms) / elapsed,
+        "commands_per_s": len(ms) * batch_size / elapsed,
+        "p50_ms": percentile(ms, 0.50),
+        "p95_ms": percentile(ms, 0.95),
+        "p99_ms": percentile(ms, 0.99),
+        "error_rate": errors / len(ms) if ms else 1.0,
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=SERVER_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LED server load test (gpiozero mock pins)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated client counts")
+    parser.add_argument("--batch", default="1,8", help="comma separated commands per request")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of every configuration")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--json", action="store_true", help="print all the results as one JSON object")
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    results = []
+    try:
+        for concurrency in map(int, args.concurrency.split(",")):
+            for batch_size in map(int, args.batch.split(",")):
+                result = asyncio.run(load(f"http://127.0.0.1:{args.port}/led", concurrency, batch_size, args.seconds))
+                results.append(result)
+                if not args.json:
+                    print(f"concurrency {concurrency:>3}, batch {batch_size:>2}: "
+                          f"{result['requests_per_s']:8.1f} req/s, {result['commands_per_s']:8.1f} cmd/s, "
+                          f"p50 {result['p50_ms']:6.2f} ms, p95 {result['p95_ms']:6.2f} ms, "
+                          f"p99 {result['p99_ms']:6.2f} ms, errors {result['error_rate']:.1%}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps({"revision": git_revision(), "python": sys.version.split()[0],
+                          "seconds": args.seconds, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# =======================================================
+# File: benchmarks/pipeline_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Offline end-to-end benchmark of the voice pipeline: WAV fixtures go through
+#              create_voice_agent with a fake chat model, a stub LED server and a null audio sink.
+#              Every entry of the configuration matrix (Whisper model, compute type, beam size)
+#              runs in a fresh process and reports STT real-time factor, per-turn latency and peak RSS.
+# Usage:
+#               uv run python -m benchmarks.pipeline_benchmark --make-fixtures   (needs espeak-ng, once)
+#               uv run python -m benchmarks.pipeline_benchmark --models tiny,small --compute-types int8 --beam-sizes 1,5 [--json]
+#               Whisper models must already be in the Hugging Face cache, nothing is downloaded.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import wave
+
+from telemetry.tracing import percentile
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Spoken with the offline TTS by --make-fixtures, replace them with real recordings when you have them
+UTTERANCES = [
+    "Turn on the red light.",
+    "Switch off the blue light, please.",
+    "Turn everything off.",
+    "What can you do for me today?",
+]
+
+
+def make_fixtures(directory):
+    from tts.backends import EspeakBackend
+    os.makedirs(directory, exist_ok=True)
+    backend = EspeakBackend()
+    for i, text in enumerate(UTTERANCES):
+        path = os.path.join(directory, f"utterance_{i:02d}.wav")
+        backend.synthesize(text, path)
+        print(f"✅ {path}: {text}")
+
+
+def wav_seconds(path) -> float:
+    with wave.open(path, "rb") as f:
+        return f.getnframes() / f.getframerate()
+
+
+# =====================
+#  CHILD (one configuration)
+# =====================
+def run_child(fixtures, repeat, tts):
+    import resource
+    from benchmarks.fakes import FakeChatModel, NullMusic, start_stub_led_server
+    os.environ["LED_API_BASE_URL"] = start_stub_led_server() # read when agent.py is imported
+
+    from langchain_core.messages import AIMessage
+    from langgraph.checkpoint.memory import InMemorySaver
+    import agent
+    from model_registry import get_stt_cascade, warmup_stt_model
+    from telemetry.tracing import get_tracer
+    from tts.playback import PlaybackWorker
+
+    # Every turn: one LLM step with a tool call, one with the answer
+    tool_call = {"name": "control_led", "args": {"color": "red", "status": "high"}, "id": "benchmark", "type": "tool_call"}
+    chat_model = FakeChatModel(responses=[AIMessage(content="", tool_calls=[tool_call]),
+                                          AIMessage(content="The red light is on. Anything else?")])
+    if tts:
+        # Null audio sink: answers still go through the player, which deletes the temporary files
+        PlaybackWorker._init_mixer = lambda self: NullMusic()
+
+    start = time.perf_counter()
+    stt_model = warmup_stt_model()
+    cascade = get_stt_cascade() if os.getenv("WHISPER_CASCADE_MODEL") else None
+    model_load_s = time.perf_counter() - start
+    stt_model = cascade or stt_model
+    voice_agent = agent.create_voice_agent(stt_model=stt_model, speak=tts, checkpointer=InMemorySaver(), chat_model=chat_model)
+
+    tracer = get_tracer()
+    turns = []
+    for i, (path, _) in enumerate(itertools.product(fixtures, range(repeat))):
+        with tracer.turn(tracer.start_turn()) as turn_id:
+            start = time.perf_counter()
+            voice_agent.invoke({"audio_input": path}, {"configurable": {"thread_id": f"benchmark-{i}"}})
+            turn_s = time.perf_counter() - start
+        stt_s = sum(span["duration_ms"] for span in tracer.turn_spans(turn_id) if span["span"] == "stt.decode") / 1000
+        turns.append({"turn_s": turn_s, "stt_s": stt_s, "audio_s": wav_seconds(path)})
+
+    turn_ms = sorted(t["turn_s"] * 1000 for t in turns)
+    rtf = sorted(t["stt_s"] / t["audio_s"] for t in turns)
+    print(json.dumps({
+        "escalation_rate": cascade.stats()["escalation_rate"] if cascade else None,
+        "turns": len(turns),
+        "model_load_s": model_load_s,
+        "stt_rtf_mean": statistics.mean(rtf),
+        "stt_rtf_p95": percentile(rtf, 0.95),
+        "turn_ms_p50": percentile(turn_ms, 0.50),
+        "turn_ms_p95": percentile(turn_ms, 0.95),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # KB on Linux
+    }))
+
+
+# =====================
+#  PARENT (configuration matrix)
+# =====================
+def run_config(config, fixtures, repeat, tts) -> dict:
+    env = dict(os.environ,
+               WHISPER_MODEL=config["model"], WHISPER_COMPUTE_TYPE=config["compute_type"],
+               WHISPER_BEAM_SIZE=str(config["beam_size"]), WHISPER_CASCADE_MODEL=config["cascade_model"],
+               HF_HUB_OFFLINE="1", GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "benchmark"),
+               # only the pipeline is measured: no fast path, no disk checkpoints, no trace file
+               INTENT_ROUTER="false", CHECKPOINT_DB="", TRACE_FILE="", METRICS_PORT="",
+               WHISPER_STREAMING="false", WHISPER_BATCHING="false")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "benchmarks.pipeline_benchmark", "--child", "--repeat", str(repeat), *fixtures]
+    if tts:
+        command.append("--tts")
+    output = subprocess.run(command, env=env, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f"configuration {config} failed:\n{output.stderr}")
+    return {**config, **json.loads(output.stdout.strip().splitlines()[-1])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end voice pipeline benchmark")
+    parser.add_argument("fixtures", nargs="*", help=f"WAV files (default: {FIXTURES_DIR}/*.wav)")
+    parser.add_argument("--models", default=os.getenv("WHISPER_MODEL", "small"), help="comma separated Whisper models")
+    parser.add_argument("--compute-types", default=os.getenv("WHISPER_COMPUTE_TYPE", "int8"), help="comma separated")
+    parser.add_argument("--beam-sizes", default="5", help="comma separated")
+    parser.add_argument("--cascade-models", default="", help="comma separated fast models for the cascade, empty entry = no cascade (e.g. ',tiny')")
+    parser.add_argument("--repeat", type=int, default=3, help="turns per fixture")
+    parser.add_argument("--tts", action="store_true", help="include TTS synthesis (TTS_BACKEND), playback goes to a null sink")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    parser.add_argument("--make-fixtures", action="store_true", help=f"synthesize the fixtures in {FIXTURES_DIR} with espeak-ng")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.make_fixtures:
+        make_fixtures(FIXTURES_DIR)
+        return
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.wav")))
+    if not fixtures:
+        parser.error(f"no WAV fixtures in {FIXTURES_DIR}, record some or run with --make-fixtures")
+    if args.child:
+        run_child(fixtures, args.repeat, args.tts)
+        return
+
+    matrix = [{"model": m, "compute_type": c, "beam_size": int(b), "cascade_model": f} for m, c, b, f in itertools.product(
+        args.models.split(","), args.compute_types.split(","), args.beam_sizes.split(","), args.cascade_models.split(","))]
+    for config in matrix:
+        result = run_config(config, fixtures, args.repeat, args.tts)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            cascade = f" (cascade from {result['cascade_model']}, {result['escalation_rate']:.0%} escalated)" if result["cascade_model"] else ""
+            print(f"{result['model']:>10} {result['compute_type']:>8} beam {result['beam_size']}{cascade}: "
+                  f"STT RTF {result['stt_rtf_mean']:.3f} (p95 {result['stt_rtf_p95']:.3f}), "
+                  f"turn p50 {result['turn_ms_p50']:.0f} ms / p95 {result['turn_ms_p95']:.0f} ms, "
+                  f"peak RSS {result['peak_rss_mb']:.0f} MB, load {result['model_load_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# =======================================================
+# File: benchmarks/startup_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Cold start time of the agent, every run in a fresh python process:
+#              import of agent.py, Whisper load + warmup decode, agent build.
+# Usage:
+#               uv run python -m benchmarks.startup_benchmark [--runs 5] [--json]
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child process, prints one JSON line with the timings
+CHILD = r"""
+import json, time
+start = time.perf_counter()
+import agent
+import_s = time.perf_counter() - start
+from model_registry import warmup_stt_async
+warmup = warmup_stt_async()
+agent.get_agent()
+agent_s = time.perf_counter() - start
+warmup.join()
+stt_s = time.perf_counter() - start
+print(json.dumps({"import_agent_s": import_s, "agent_ready_s": agent_s, "stt_warm_s": stt_s}))
+"""
+
+
+def run_once(env) -> dict:
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True)
+    if output.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent startup time benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the summary as one JSON object")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark") # the client is built but never called
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    summary = {"runs": args.runs, "whisper_model": os.getenv("WHISPER_MODEL", "small")}
+    for metric in runs[0]:
+        values = [run[metric] for run in runs]
+        summary[f"{metric}_median"] = statistics.median(values)
+        summary[f"{metric}_min"] = min(values)
+
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        for metric in runs[0]:
+            print(f"{metric:16} median {summary[f'{metric}_median']:.3f}s  min {summary[f'{metric}_min']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
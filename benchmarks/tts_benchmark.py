@@ -0,0 +1,79 @@
+# =======================================================
+# File: benchmarks/tts_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Synthesis real-time factor of every TTS backend on typical agent answers.
+#              RTF = synthesis time / duration of the produced audio (lower is faster).
+# Usage:
+#               uv run python -m benchmarks.tts_benchmark [--backends gtts espeak] [--repeat 3] [--json]
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from faster_whisper import decode_audio
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from telemetry.tracing import percentile
+from tts.backends import TTS_BACKENDS
+
+PHRASES = [
+    "LED 'red' set to 'high' successfully.",
+    "Done, the blue light is now off.",
+    "I turned on the red LED and turned off the blue one, anything else?",
+    "I am Little Jhon, a robot assistant for smart home and IoT devices. I can switch your lights on and off.",
+]
+
+
+def benchmark_backend(backend, repeat: int) -> dict:
+    synthesis_times = []
+    audio_seconds = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeat):
+            for j, text in enumerate(PHRASES):
+                filename = os.path.join(tmp, f"{i}_{j}.{backend.extension}")
+                start = time.perf_counter()
+                backend.synthesize(text, filename)
+                synthesis_times.append(time.perf_counter() - start)
+                audio_seconds.append(len(decode_audio(filename)) / 16000)
+
+    rtf = [s / a for s, a in zip(synthesis_times, audio_seconds) if a > 0]
+    return {
+        "backend": backend.voice,
+        "syntheses": len(synthesis_times),
+        "synthesis_ms_p50": percentile(synthesis_times, 0.50) * 1000,
+        "synthesis_ms_max": max(synthesis_times) * 1000,
+        "audio_seconds_total": sum(audio_seconds),
+        "rtf_mean": statistics.mean(rtf),
+        "rtf_max": max(rtf),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS backend real-time factor benchmark")
+    parser.add_argument("--backends", nargs="+", default=list(TTS_BACKENDS), choices=list(TTS_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per backend")
+    args = parser.parse_args()
+
+    for name in args.backends:
+        try:
+            result = benchmark_backend(TTS_BACKENDS[name](), args.repeat)
+        except Exception as e:
+            result = {"backend": name, "error": str(e)}
+
+        if args.json:
+            print(json.dumps(result))
+        elif "error" in result:
+            print(f"{name:8} failed: {result['error']}")
+        else:
+            print(f"{result['backend']:20} RTF mean {result['rtf_mean']:.3f}  max {result['rtf_max']:.3f}  "
+                  f"synthesis p50 {result['synthesis_ms_p50']:.0f} ms  max {result['synthesis_ms_max']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
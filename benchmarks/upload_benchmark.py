@@ -0,0 +1,106 @@
+# =======================================================
+# File: benchmarks/upload_benchmark.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Bytes on the wire against CPU cost of the utterance upload codecs
+#              (recorder/audio_codec.py): raw PCM, FLAC and Opus at a few bitrates.
+#              Encode CPU is paid on the microphone device, decode CPU on the gateway
+#              (StreamingDecoder fed in the gateway chunk size).
+# Usage:
+#               uv run python -m benchmarks.upload_benchmark [fixtures.wav ...] [--bitrates 16000,24000,32000] [--repeat 5] [--json]
+#               Without arguments it uses benchmarks/fixtures/*.wav (see pipeline_benchmark.py --make-fixtures)
+#               or a synthetic voice-like signal.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+import numpy as np
+
+from recorder.audio_codec import StreamingDecoder, encode_audio
+from telemetry.tracing import percentile
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SAMPLERATE = 16000
+CHUNK_BYTES = 16 * 1024 # same as gateway.UPLOAD_CHUNK_BYTES
+
+
+def load_utterances(paths) -> list[np.ndarray]:
+    if paths:
+        from faster_whisper import decode_audio
+        return [decode_audio(path, sampling_rate=SAMPLERATE) for path in paths]
+    # 4 s of harmonics with a syllable-rate envelope and some noise, roughly as hard to compress as speech
+    rng = np.random.default_rng(0)
+    t = np.arange(4 * SAMPLERATE) / SAMPLERATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLERATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    return [(0.2 * voice * envelope + 0.01 * rng.standard_normal(len(t))).astype(np.float32)]
+
+
+def decode(body: bytes, content_type: str) -> np.ndarray:
+    decoder = StreamingDecoder(content_type, samplerate=SAMPLERATE)
+    for i in range(0, len(body), CHUNK_BYTES):
+        decoder.feed(body[i:i + CHUNK_BYTES])
+    return decoder.result()
+
+
+def benchmark_codec(codec, bitrate, utterances, repeat) -> dict:
+    audio_seconds = sum(len(u) for u in utterances) / SAMPLERATE
+    sizes, encode_cpu, decode_cpu, errors = [], [], [], []
+    for _ in range(repeat):
+        for audio in utterances:
+            start = time.process_time() # CPU time: the decode worker thread is included
+            body, content_type = encode_audio(audio, samplerate=SAMPLERATE, codec=codec, bitrate=bitrate)
+            encode_cpu.append(time.process_time() - start)
+            start = time.process_time()
+            decoded = decode(body, content_type)
+            decode_cpu.append(time.process_time() - start)
+            sizes.append(len(body))
+            # Lossy codecs: difference with the original, after aligning the lengths
+            n = min(len(audio), len(decoded))
+            errors.append(float(np.sqrt(np.mean((audio[:n] - decoded[:n]) ** 2))))
+    return {
+        "codec": codec if codec != "opus" else f"opus_{bitrate // 1000}k",
+        "audio_s": audio_seconds,
+        "bytes": int(sum(sizes) / repeat),
+        "kbps": sum(sizes) / repeat * 8 / audio_seconds / 1000,
+        "encode_cpu_ms_per_s": sum(encode_cpu) / repeat / audio_seconds * 1000,
+        "decode_cpu_ms_per_s": sum(decode_cpu) / repeat / audio_seconds * 1000,
+        "encode_cpu_ms_p50": percentile(encode_cpu, 0.50) * 1000,
+        "decode_cpu_ms_p50": percentile(decode_cpu, 0.50) * 1000,
+        "rms_error": statistics.mean(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload codec benchmark: bytes on the wire vs encode/decode CPU")
+    parser.add_argument("fixtures", nargs="*", help=f"WAV files (default: {FIXTURES_DIR}/*.wav or a synthetic signal)")
+    parser.add_argument("--bitrates", default="16000,24000,32000", help="comma separated Opus bitrates")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON lines")
+    args = parser.parse_args()
+
+    utterances = load_utterances(args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.wav"))))
+    configs = [("pcm", 0), ("flac", 0)] + [("opus", int(b)) for b in args.bitrates.split(",")]
+    results = [benchmark_codec(codec, bitrate, utterances, args.repeat) for codec, bitrate in configs]
+
+    pcm_bytes = results[0]["bytes"]
+    for result in results:
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{result['codec']:>10}: {result['bytes'] / 1024:7.1f} KB ({result['bytes'] / pcm_bytes:4.0%} of PCM, "
+                  f"{result['kbps']:6.1f} kbit/s), encode {result['encode_cpu_ms_per_s']:5.1f} ms CPU "
+                  f"and decode {result['decode_cpu_ms_per_s']:5.1f} ms CPU per second of audio, "
+                  f"RMS error {result['rms_error']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
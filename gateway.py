@@ -0,0 +1,223 @@
+# =======================================================
+# File: gateway.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Local network voice gateway, one agent host for many IoT microphones.
+#              Every device gets its own conversation thread, turns run under asyncio
+#              with a bounded concurrency and a 503 backpressure answer when the host is full.
+# Requirements:
+#               microdot
+#               all the agent requirements (see agent.py)
+# Usage:
+#               uv run gateway.py
+#               curl -X POST -H "Content-Type: audio/wav" --data-binary @human_message.wav http://127.0.0.1:8080/voice/kitchen
+#               curl -X POST -H "Content-Type: audio/flac" --data-binary @human_message.flac http://127.0.0.1:8080/voice/kitchen
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+from microdot import Microdot, Request
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+import asyncio, os, re, time, weakref
+
+from agent import create_voice_agent
+from recorder.audio_codec import StreamingDecoder
+from telemetry.tracing import get_tracer
+
+load_dotenv()
+
+GATEWAY_HOST = os.getenv("GATEWAY_HOST", "0.0.0.0")
+GATEWAY_PORT = int(os.getenv("GATEWAY_PORT", "8080"))
+MAX_CONCURRENT_TURNS = int(os.getenv("GATEWAY_MAX_CONCURRENCY", "4"))
+MAX_WAITING_TURNS = int(os.getenv("GATEWAY_MAX_QUEUE", "4"))
+MAX_UPLOAD_BYTES = int(float(os.getenv("GATEWAY_MAX_UPLOAD_MB", "4")) * 1024 * 1024)
+# A slow or stalled upload is dropped after this, it never holds a turn slot while it arrives
+UPLOAD_TIMEOUT = float(os.getenv("GATEWAY_UPLOAD_TIMEOUT_S", "15"))
+
+# Microdot accepts 16 KB bodies by default, an utterance is much bigger.
+# Bodies above max_body_length are not buffered: they are read from request.stream and decoded while they arrive
+Request.max_content_length = MAX_UPLOAD_BYTES
+UPLOAD_CHUNK_BYTES = 16 * 1024
+
+DEVICE_ID = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+# =====================
+#  BACKPRESSURE
+# =====================
+class TurnLimiter:
+    """
+    At most `limit` turns run together and `max_waiting` wait, the others are refused.
+    A turn waits for the previous turn of its device first and only then for a slot:
+    a device with queued turns never holds a slot it cannot use, other devices get through.
+    """
+
+    def __init__(self, limit, max_waiting):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0 # on their device lock or on a slot
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def full(self) -> bool:
+        return self.active + self.waiting >= self.limit + self.max_waiting
+
+    @asynccontextmanager
+    async def arrive(self):
+        """A turn counts as waiting from its arrival (upload included) until it runs or leaves."""
+        self.waiting += 1
+        ticket = {"running": False}
+        try:
+            yield ticket
+        finally:
+            if not ticket["running"]:
+                self.waiting -= 1
+
+    @asynccontextmanager
+    async def turn(self, ticket: dict, device_lock: asyncio.Lock):
+        async with device_lock:
+            async with self._semaphore:
+                self.waiting -= 1
+                self.active += 1
+                ticket["running"] = True
+                try:
+                    yield
+                finally:
+                    self.active -= 1
+
+
+# =====================
+#  AUDIO
+# =====================
+async def decode_upload(request: Request, timeout=UPLOAD_TIMEOUT) -> StreamingDecoder:
+    """
+    Float32 mono 16 kHz samples from raw int16 PCM (audio/L16, rate= resampled to 16 kHz) or any container
+    ffmpeg can read (wav, flac, ogg/opus...). Raises ValueError when the upload cannot be decoded and
+    TimeoutError when it takes longer than `timeout` seconds to arrive.
+    Compressed uploads are decoded on a worker thread chunk by chunk, while the rest is still being received.
+    """
+    decoder = StreamingDecoder(request.content_type)
+    try:
+        await asyncio.wait_for(_receive(request, decoder), timeout)
+    except BaseException:
+        decoder.close() # aborted or stalled: the decoder worker would wait for the rest forever
+        raise
+    return decoder
+
+
+async def _receive(request: Request, decoder: StreamingDecoder):
+    remaining = request.content_length # the connection stays open, never read past the body
+    while remaining > 0:
+        chunk = await request.stream.read(min(UPLOAD_CHUNK_BYTES, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        decoder.feed(chunk)
+
+
+def message_text(message) -> str:
+    return message.text.strip() if message else ""
+
+
+# =====================
+#  SERVER
+# =====================
+app = Microdot()
+agent = None
+limiter = TurnLimiter(MAX_CONCURRENT_TURNS, MAX_WAITING_TURNS)
+# One turn at a time for each device thread. A lock lives as long as a request holds or waits for it,
+# so the map only has the devices that are talking right now
+device_locks = weakref.WeakValueDictionary()
+
+
+def device_lock(device_id: str) -> asyncio.Lock:
+    lock = device_locks.get(device_id)
+    if lock is None:
+        lock = device_locks[device_id] = asyncio.Lock()
+    return lock
+
+
+@app.post('/voice/<device_id>')
+async def voice(request, device_id):
+    """
+    Runs one turn for a device. The body is the utterance:
+    raw int16 PCM (Content-Type: audio/L16; rate=16000) or an audio file (audio/flac, audio/ogg with Opus, audio/wav...).
+    Undecodable or empty audio is refused with 400.
+    """
+    if not DEVICE_ID.match(device_id):
+        return {'error': 'Not a valid device id.'}, 400
+    if not request.content_length:
+        return {'error': 'Empty audio.'}, 400
+    if limiter.full():
+        limiter.rejected += 1
+        return {'error': 'Gateway busy, retry later.'}, 503, {'Retry-After': '1'}
+
+    start = time.perf_counter()
+    config = {"configurable": {"thread_id": f"device-{device_id}"}}
+    tracer = get_tracer()
+    turn_id = tracer.start_turn() # every request runs in its own task, the turn ID stays with it
+    async with limiter.arrive() as ticket:
+        try:
+            # Received and decoded before the turn takes a slot: a slow link only delays its own device
+            with tracer.span("upload.decode", bytes=request.content_length, content_type=request.content_type) as span:
+                try:
+                    decoder = await decode_upload(request)
+                    audio = await asyncio.to_thread(decoder.result)
+                except TimeoutError:
+                    return {'error': f'Upload not received within {UPLOAD_TIMEOUT:.0f}s.'}, 408
+                except ValueError as e:
+                    # The device sent something that is not audio, a retry would fail the same way
+                    return {'error': str(e)}, 400
+                span["audio_s"] = round(len(audio) / decoder.samplerate, 2)
+            if len(audio) == 0:
+                return {'error': 'Empty audio.'}, 400
+            async with limiter.turn(ticket, device_lock(device_id)):
+                previous = await agent.aget_state(config)
+                seen = {m.id for m in previous.values.get("messages", [])} # the history may be trimmed, ids are stable
+                response = await agent.ainvoke({"audio_input": audio}, config)
+        except Exception as e:
+            print(f"[GATEWAY] Error during the turn of {device_id}: {e}")
+            return {'error': f'Error during the turn: {e}'}, 500
+
+    # Only this turn's messages: a silent utterance adds none
+    new_messages = [m for m in response["messages"] if m.id not in seen]
+    transcript = next((m for m in new_messages if m.type == "human"), None)
+    reply = next((m for m in reversed(new_messages) if m.type == "ai"), None)
+    elapsed = time.perf_counter() - start
+    print(f"[GATEWAY] {device_id}: turn completed in {elapsed:.2f}s")
+    tracer.record("turn.gateway", time.time() - elapsed, elapsed, device_id=device_id)
+    return {
+        'device_id': device_id,
+        'thread_id': config["configurable"]["thread_id"],
+        'turn_id': turn_id,
+        'transcript': message_text(transcript),
+        'reply': message_text(reply),
+        'seconds': round(elapsed, 3),
+    }
+
+
+@app.get('/metrics')
+async def metrics(request):
+    """Per-stage latency summary of the recent turns (telemetry/tracing.py)."""
+    return get_tracer().summary()
+
+
+@app.get('/health')
+async def health(request):
+    return {
+        'status': 'ok',
+        'active': limiter.active,
+        'waiting': limiter.waiting,
+        'rejected': limiter.rejected,
+        'max_concurrency': limiter.limit,
+        'max_queue': limiter.max_waiting,
+    }
+
+
+if __name__ == "__main__":
+    # Answers go back to the device, nothing is played on the gateway host
+    agent = create_voice_agent(speak=False)
+    print(f"🏢 Voice gateway listening on {GATEWAY_HOST}:{GATEWAY_PORT} "
+          f"({MAX_CONCURRENT_TURNS} concurrent turns, {MAX_WAITING_TURNS} queued)")
+    app.run(host=GATEWAY_HOST, port=GATEWAY_PORT)
@@ -13,12 +13,36 @@
 import pygame
 import sys
 from recorder.audio_recorder import AudioRecorder
-from agent import create_voice_agent, config
+from agent import get_agent, load_stt_model, load_streaming_transcriber, config, AUDIO_IN_MEMORY
+from model_registry import warmup_stt_async
+from telemetry.tracing import get_tracer
 import threading
 import queue
 
+# Custom events posted by the worker threads, they wake up the event loop
+AGENT_READY = pygame.USEREVENT + 1
+TURN_PROGRESS = pygame.USEREVENT + 2
+TURN_DONE = pygame.USEREVENT + 3
+
+
+def progress_label(update: dict) -> str | None:
+    """What the agent does next, from the graph node that just finished (stream_mode="updates")."""
+    for node, value in update.items():
+        if node == "model":
+            messages = (value or {}).get("messages") or []
+            tool_calls = getattr(messages[-1], "tool_calls", None) if messages else None
+            if tool_calls:
+                return f"Running {tool_calls[0]['name']}..."
+            return "Speaking..."
+        if node == "tools" or node.startswith("SpeechToTextMiddleware"):
+            return "Thinking..."
+    return None
+
+
 class VoiceAssistantGUI:
     def __init__(self):
+        # Whisper loads and warms up in background while the window comes up
+        warmup_stt_async()
         pygame.init()
         
         # Screen setup
@@ -33,28 +57,51 @@ class VoiceAssistantGUI:
         self.COLOR_BLACK = (0, 0, 0)
         self.COLOR_WHITE = (255, 255, 255)
         
-        # Font
+        # Fonts and rendered texts are created once
         self.FONT = pygame.font.Font(None, 36)
+        self.HINT_FONT = pygame.font.Font(None, 24)
+        self._text_cache = {}
         
         # Button
         self.BUTTON_RECT = pygame.Rect(50, 25, 300, 100)
         self.KEY_TO_USE = pygame.K_SPACE
         
-        # State
+        # State, the screen is redrawn only when it changes (see run)
         self.is_recording = False
         self.is_processing = False
+        self.is_loading = True
+        self.progress = "Processing..."
+        self.dirty = True
         
-        # Initialize recorder and agent
-        self.recorder = AudioRecorder(filename="human_message.wav")
-        self.agent = create_voice_agent()
+        # Initialize recorder, the agent is built in background
+        self.recorder = AudioRecorder(filename="human_message.wav", in_memory=AUDIO_IN_MEMORY)
+        self.agent = None
+        threading.Thread(target=self.load_agent, daemon=True).start()
         
-        # Response queue for async processing
-        self.response_queue = queue.Queue()
+        # One long-lived worker runs the turns, in order
+        self.jobs = queue.Queue()
+        threading.Thread(target=self.agent_worker, daemon=True).start()
         
+    def load_agent(self):
+        # Shared process-wide models: nothing is loaded twice
+        self.recorder.transcriber = load_streaming_transcriber(load_stt_model())
+        self.agent = get_agent()
+        pygame.event.post(pygame.event.Event(AGENT_READY))
+
+    def render_text(self, font, text, color):
+        key = (id(font), text, color)
+        if key not in self._text_cache:
+            self._text_cache[key] = font.render(text, True, color)
+        return self._text_cache[key]
+
     def draw_button(self):
-        if self.is_processing:
+        if self.is_loading:
+            color = self.COLOR_RED
+            text = "Loading..."
+            key_hint = ""
+        elif self.is_processing:
             color = self.COLOR_RED
-            text = "Processing..."
+            text = self.progress
             key_hint = ""
         elif self.is_recording:
             color = self.COLOR_RED
@@ -67,86 +114,108 @@ class VoiceAssistantGUI:
 
         pygame.draw.rect(self.screen, color, self.BUTTON_RECT, border_radius=10)
         
-        text_surface = self.FONT.render(text, True, self.COLOR_WHITE)
+        text_surface = self.render_text(self.FONT, text, self.COLOR_WHITE)
         text_rect = text_surface.get_rect(center=self.BUTTON_RECT.center)
         self.screen.blit(text_surface, text_rect)
         
         if key_hint:
-            hint_font = pygame.font.Font(None, 24)
-            hint_surface = hint_font.render(key_hint.replace("SPACE", "SPAZIO"), True, self.COLOR_BLACK)
+            hint_surface = self.render_text(self.HINT_FONT, key_hint.replace("SPACE", "SPAZIO"), self.COLOR_BLACK)
             hint_rect = hint_surface.get_rect(center=(self.BUTTON_RECT.centerx, self.BUTTON_RECT.bottom + 10))
             self.screen.blit(hint_surface, hint_rect)
 
-    def process_audio(self, audio_file):
+    def agent_worker(self):
+        while True:
+            audio_file, turn_id = self.jobs.get()
+            response = self.process_audio(audio_file, turn_id)
+            pygame.event.post(pygame.event.Event(TURN_DONE, response=response))
+
+    def process_audio(self, audio_file, turn_id=None):
+        tracer = get_tracer()
         try:
-            response = self.agent.invoke({
-                "audio_input": audio_file,
-            },config)
-            self.response_queue.put(response)
+            with tracer.turn(turn_id), tracer.span("turn.agent"):
+                if self.recorder.transcriber:
+                    # Streaming mode: only the tail is left to decode
+                    with tracer.span("stt.stream_finish"):
+                        inputs = {"text_input": self.recorder.transcriber.finish()}
+                else:
+                    inputs = {"audio_input": audio_file}
+                response = None
+                # Same run as invoke(), the node updates drive the progress shown on the button
+                for mode, chunk in self.agent.stream(inputs, config, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        response = chunk
+                    elif label := progress_label(chunk):
+                        pygame.event.post(pygame.event.Event(TURN_PROGRESS, text=label))
+            return response
         except Exception as e:
             print(f"Error processing audio: {e}")
-        finally:
-            self.is_processing = False
+            return None
+
+    def set_state(self, **state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.dirty = True
+
+    def start_recording(self):
+        self.set_state(is_recording=True)
+        self.recorder.start_recording()
+
+    def stop_recording(self):
+        self.set_state(is_recording=False)
+        audio_file = self.recorder.stop_recording()
+        if audio_file is not None:
+            self.set_state(is_processing=True, progress="Transcribing...")
+            self.jobs.put((audio_file, self.recorder.turn_id))
 
     def run(self):
         self.recorder.start_stream()
-        clock = pygame.time.Clock()
         running = True
 
         while running:
-            for event in pygame.event.get():
+            # Sleeps until something happens: no frame is drawn while idle
+            events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
+
+                if event.type == AGENT_READY:
+                    self.set_state(is_loading=False)
+
+                if event.type == TURN_PROGRESS:
+                    self.set_state(progress=event.text)
+
+                if event.type == TURN_DONE:
+                    self.set_state(is_processing=False)
+                    if event.response:
+                        print("🤖 Agent said:")
+                        for msg in event.response["messages"]:
+                            msg.pretty_print()
+
+                if event.type == pygame.VIDEOEXPOSE or event.type == pygame.WINDOWEXPOSED:
+                    self.dirty = True
                 
-                if not self.is_processing:
+                if not self.is_processing and not self.is_loading:
                     if event.type == pygame.KEYDOWN:
                         if event.key == self.KEY_TO_USE and not self.is_recording:
-                            self.is_recording = True
-                            self.recorder.start_recording()
+                            self.start_recording()
 
                     if event.type == pygame.KEYUP:
                         if event.key == self.KEY_TO_USE and self.is_recording:
-                            self.is_recording = False
-                            audio_file = self.recorder.stop_recording()
-                            if audio_file:
-                                self.is_processing = True
-                                thread = threading.Thread(
-                                    target=self.process_audio,
-                                    args=(audio_file,)
-                                )
-                                thread.start()
+                            self.stop_recording()
 
                     if event.type == pygame.MOUSEBUTTONDOWN:
                         if self.BUTTON_RECT.collidepoint(event.pos) and not self.is_recording:
-                            self.is_recording = True
-                            self.recorder.start_recording()
+                            self.start_recording()
 
                     if event.type == pygame.MOUSEBUTTONUP:
                         if self.is_recording:
-                            self.is_recording = False
-                            audio_file = self.recorder.stop_recording()
-                            if audio_file:
-                                self.is_processing = True
-                                thread = threading.Thread(
-                                    target=self.process_audio,
-                                    args=(audio_file,)
-                                )
-                                thread.start()
-
-            # Check for agent responses
-            try:
-                while True:
-                    response = self.response_queue.get_nowait()
-                    print("🤖 Agent said:")
-                    for msg in response["messages"]:
-                        msg.pretty_print()
-            except queue.Empty:
-                pass
-
-            self.screen.fill(self.COLOR_WHITE)
-            self.draw_button()
-            pygame.display.flip()
-            clock.tick(60)
+                            self.stop_recording()
+
+            if self.dirty:
+                self.screen.fill(self.COLOR_WHITE)
+                self.draw_button()
+                pygame.display.flip()
+                self.dirty = False
 
         self.recorder.stop_stream()
         pygame.quit()
@@ -0,0 +1,127 @@
+# =======================================================
+# File: iot/led_client.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: HTTP transport for the LED server used by the agent tools.
+#              Keep-alive connection pools (requests for invoke, httpx for ainvoke)
+#              and retries with jittered backoff inside a strict latency budget.
+# Requirements:
+#               requests, httpx
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from requests.adapters import HTTPAdapter
+import asyncio
+import random
+import time
+import httpx
+import requests
+
+
+class LedServerError(Exception):
+    """The LED server could not be reached (or kept failing) within the latency budget."""
+
+
+class LedClient:
+    """
+    Sends command lists to the LED server. A call never takes longer than `budget` seconds:
+    every attempt gets the time left (at most `attempt_timeout`), connection errors, timeouts
+    and 5xx answers are retried after a jittered backoff, 4xx answers are not retried.
+    """
+
+    def __init__(self, url, budget=1.5, attempt_timeout=0.75, backoff=0.05, pool_size=4):
+        self.url = url
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        # httpx clients are bound to the event loop they were first used in
+        self._async_client = None
+        self._async_loop = None
+        # Last LED state and its ETag, see state()
+        self.last_state = None
+        self.etag = None
+
+    def post(self, commands: list[dict]) -> dict:
+        return self._parse(self._send("POST", self.url, json=commands))
+
+    async def apost(self, commands: list[dict]) -> dict:
+        return self._parse(await self._asend("POST", self.url, json=commands))
+
+    def state(self) -> dict:
+        """LED state from GET /led/state, revalidated with the last ETag (a 304 reuses the cached copy)."""
+        return self._cache_state(self._send("GET", f"{self.url}/state", headers=self._state_headers()))
+
+    async def astate(self) -> dict:
+        return self._cache_state(await self._asend("GET", f"{self.url}/state", headers=self._state_headers()))
+
+    def _send(self, method, url, **kwargs):
+        deadline = time.monotonic() + self.budget
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(deadline)
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code < 500:
+                    return response
+                error = f"HTTP {response.status_code}"
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            attempt += 1
+            time.sleep(self._backoff(attempt, deadline, error))
+
+    async def _asend(self, method, url, **kwargs):
+        deadline = time.monotonic() + self.budget
+        client = self._get_async_client()
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(deadline)
+            try:
+                response = await client.request(method, url, timeout=timeout, **kwargs)
+                if response.status_code < 500:
+                    return response
+                error = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                error = str(e) or type(e).__name__
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt, deadline, error))
+
+    def _state_headers(self) -> dict:
+        return {"If-None-Match": self.etag} if self.etag else {}
+
+    def _cache_state(self, response) -> dict:
+        if response.status_code == 304 and self.last_state is not None:
+            return self.last_state
+        self.last_state = self._parse(response)
+        self.etag = response.headers.get("ETag")
+        return self.last_state
+
+    @staticmethod
+    def _parse(response) -> dict:
+        if response.status_code >= 400:
+            raise LedServerError(f"HTTP {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def _attempt_timeout(self, deadline) -> float:
+        return max(0.05, min(self.attempt_timeout, deadline - time.monotonic()))
+
+    def _backoff(self, attempt, deadline, error) -> float:
+        """Full-jitter exponential backoff, raises when the next attempt would not fit in the budget."""
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        if time.monotonic() + delay + 0.05 >= deadline:
+            raise LedServerError(f"{error} (gave up after {attempt} attempts, {self.budget}s budget)")
+        print(f"[LED] Attempt {attempt} failed ({error}), retrying in {delay * 1000:.0f} ms")
+        return delay
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            self._async_client = httpx.AsyncClient(limits=limits)
+            self._async_loop = loop
+        return self._async_client
+
@@ -0,0 +1,41 @@
+# =======================================================
+# File: historyTrimMiddleware.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: A langchain middleware that keeps only the last turns of the conversation,
+#              so the checkpoint saved after every step (and the prompt) stops growing.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain.messages import HumanMessage, RemoveMessage
+from langgraph.runtime import Runtime
+from typing import Any
+
+
+# Middleware before model
+class HistoryTrimMiddleware(AgentMiddleware):
+    """
+    Before the model runs, the messages older than the last `max_turns` turns are removed
+    from the state. A turn starts with a HumanMessage, so a tool call is never separated
+    from its result.
+    """
+
+    def __init__(self, max_turns=20):
+        if max_turns < 1:
+            raise ValueError("max_turns must be at least 1")
+        self.max_turns = max_turns
+        super().__init__()
+
+    def before_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        messages = state.get("messages", [])
+        starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(starts) <= self.max_turns:
+            return None
+        old = messages[:starts[-self.max_turns]]
+        print(f"[HISTORY] {len(old)} old messages removed")
+        return {"messages": [RemoveMessage(id=m.id) for m in old]}
+
+    async def abefore_model(self, state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+        return self.before_model(state, runtime)
@@ -0,0 +1,142 @@
+# =======================================================
+# File: intentRouterMiddleware.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: A langchain middleware that answers simple device commands locally.
+#              "Turn the red light on" is matched with strict patterns, the tool call
+#              and the reply are produced without a Gemini round-trip; anything else
+#              goes to the model as usual.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain.messages import AIMessage, HumanMessage, ToolMessage
+from typing import Awaitable, Callable
+import re
+import threading
+import time
+import uuid
+
+# Only whole utterances are matched: a command plus polite filler, nothing else
+_FILLER = r"(?:(?:hey\s+)?little\s+j\w+\s+)?(?:please\s+)?(?:(?:can|could|would)\s+you\s+)?"
+_DEVICE = r"(?:the\s+)?(?P<color>red|blue)\s+(?:light|led|lamp)"
+_STATUS = r"(?P<status>on|off)"
+_VERB = r"(?:turn|switch|put)"
+_END = r"(?:\s+please)?$"
+
+LED_PATTERNS = [
+    re.compile(rf"^{_FILLER}{_VERB}\s+{_STATUS}\s+{_DEVICE}{_END}"),   # turn on the red light
+    re.compile(rf"^{_FILLER}{_VERB}\s+{_DEVICE}\s+{_STATUS}{_END}"),   # turn the red light on
+    re.compile(rf"^{_DEVICE}\s+{_STATUS}{_END}"),                      # red light on
+]
+LED_STATUS = {"on": "high", "off": "low"}
+TOOL_CALL_PREFIX = "intent_router_"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, no punctuation, single spaces: Whisper adds capitals and a final dot."""
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return " ".join(text.split())
+
+
+def match_led_command(text: str) -> dict | None:
+    """Returns the control_led arguments for a simple LED command, None when not confident."""
+    text = normalize(text)
+    for pattern in LED_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return {"color": match["color"], "status": LED_STATUS[match["status"]]}
+    return None
+
+
+# Middleware around the model call
+class IntentRouterMiddleware(AgentMiddleware):
+    """
+    First model call of a matched turn: returns the control_led tool call, the tool node runs it.
+    Second model call (the tool result is the last message): returns a templated reply.
+    Both calls skip the chat model, unmatched turns reach it untouched.
+    """
+
+    def __init__(self, tool_name="control_led", matcher=match_led_command):
+        self.tool_name = tool_name
+        self.matcher = matcher
+        self._lock = threading.Lock()
+        self._started = {} # tool_call_id -> perf_counter of the match
+        self.turns = 0
+        self.hits = 0
+        self.completed = 0
+        self.match_seconds = 0.0
+        self.fast_path_seconds = 0.0
+        super().__init__()
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        return self._route(request) or handler(request)
+
+    async def awrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Awaitable[ModelResponse]]) -> ModelResponse:
+        return self._route(request) or await handler(request)
+
+    def _route(self, request: ModelRequest) -> ModelResponse | None:
+        last_msg = request.messages[-1] if request.messages else None
+        if isinstance(last_msg, ToolMessage) and last_msg.tool_call_id.startswith(TOOL_CALL_PREFIX):
+            return self._reply(request, last_msg)
+        if isinstance(last_msg, HumanMessage):
+            return self._match(request, last_msg)
+        return None
+
+    def _match(self, request: ModelRequest, message: HumanMessage) -> ModelResponse | None:
+        start = time.perf_counter()
+        tool_names = {getattr(t, "name", None) for t in request.tools}
+        args = self.matcher(message.text) if self.tool_name in tool_names else None
+        with self._lock:
+            self.turns += 1
+            self.match_seconds += time.perf_counter() - start
+            if args is None:
+                self._print_stats()
+                return None
+            self.hits += 1
+            tool_call_id = f"{TOOL_CALL_PREFIX}{uuid.uuid4().hex}"
+            self._started[tool_call_id] = start
+        print(f"[ROUTER] Fast path: {self.tool_name}({args})")
+        tool_call = {"name": self.tool_name, "args": args, "id": tool_call_id, "type": "tool_call"}
+        return ModelResponse(result=[AIMessage(content="", tool_calls=[tool_call])])
+
+    def _reply(self, request: ModelRequest, tool_msg: ToolMessage) -> ModelResponse:
+        call = next((c for m in reversed(request.messages) if isinstance(m, AIMessage)
+                     for c in m.tool_calls if c["id"] == tool_msg.tool_call_id), None)
+        args = call["args"] if call else {}
+        light = f"{args.get('color', 'the')} light"
+        if tool_msg.status == "error" or tool_msg.text.startswith("ERROR"):
+            text = f"Sorry, I could not reach the {light}."
+        else:
+            text = f"Done, the {light} is {'on' if args.get('status') == 'high' else 'off'}."
+
+        with self._lock:
+            start = self._started.pop(tool_msg.tool_call_id, None)
+            if start is not None:
+                elapsed = time.perf_counter() - start
+                self.fast_path_seconds += elapsed
+                self.completed += 1
+                print(f"[ROUTER] Command completed without the LLM in {elapsed * 1000:.1f} ms")
+                self._print_stats()
+        # Marked so streaming TTS knows this reply was not streamed by a model
+        return ModelResponse(result=[AIMessage(content=text, response_metadata={"local_reply": True})])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> dict:
+        return {
+            "turns": self.turns,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.turns if self.turns else 0.0,
+            "avg_match_ms": self.match_seconds / self.turns * 1000 if self.turns else 0.0,
+            "avg_fast_path_ms": self.fast_path_seconds / self.completed * 1000 if self.completed else 0.0,
+        }
+
+    def _print_stats(self):
+        # Once per routed turn, under the lock (like the TTS cache line)
+        stats = self._stats()
+        print(f"[ROUTER] {stats['hits']}/{stats['turns']} turns on the fast path ({stats['hit_rate']:.0%}), "
+              f"match {stats['avg_match_ms']:.2f} ms, fast path {stats['avg_fast_path_ms']:.1f} ms avg")
@@ -0,0 +1,226 @@
+# =======================================================
+# File: responseCacheMiddleware.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: A langchain middleware that replays the tool plan and the answer of a
+#              repeated command without calling the model. Entries are keyed by the
+#              normalized transcript and the device state, with TTL and LRU eviction.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain.messages import AIMessage, HumanMessage, ToolMessage
+from collections import OrderedDict
+from typing import Awaitable, Callable
+from middleware.intentRouterMiddleware import normalize
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+TOOL_CALL_PREFIX = "plan_cache_"
+# The meaning of these depends on the conversation, such turns are never cached
+CONTEXT_WORDS = {"it", "that", "this", "them", "those", "these", "again", "same", "other", "too", "also"}
+
+
+# Middleware around the model call
+class ResponseCacheMiddleware(AgentMiddleware):
+    """
+    A miss runs the model as usual and, when the turn ends with a plan that called tools
+    without errors, stores the model messages of the turn and the tool results. A hit replays
+    them one model call at a time: the tools really run again, only the model is skipped.
+    Before each later step the new tool results are compared with the stored ones: when one
+    failed or differs, the entry is evicted and the model answers from there.
+    The device state is part of the key, so an answer is only reused for the same state;
+    when the state cannot be read the cache is bypassed.
+    """
+
+    def __init__(self, read_state: Callable[[], dict], aread_state: Callable[[], Awaitable[dict]] | None = None,
+                 ttl_seconds=3600, max_entries=256):
+        self.read_state = read_state
+        self.aread_state = aread_state
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (stored at, [AIMessage, ...], [[tool result text, ...] per AIMessage])
+        self._turns = {} # id of the HumanMessage -> ("record", key) or ("replay", key, plan, results)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        super().__init__()
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        human, step = self._turn_position(request)
+        if human is not None and step == 0 and self._cacheable(human):
+            self._start_turn(human, self._read_state_safely())
+        replay = self._replay(request, human, step)
+        if replay:
+            return replay
+        try:
+            response = handler(request)
+        except Exception:
+            self._forget(human) # the turn will not end normally
+            raise
+        self._record(request, human, response)
+        return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Awaitable[ModelResponse]]) -> ModelResponse:
+        human, step = self._turn_position(request)
+        if human is not None and step == 0 and self._cacheable(human):
+            self._start_turn(human, await self._aread_state_safely())
+        replay = self._replay(request, human, step)
+        if replay:
+            return replay
+        try:
+            response = await handler(request)
+        except Exception:
+            self._forget(human) # the turn will not end normally
+            raise
+        self._record(request, human, response)
+        return response
+
+    # =====================
+    #  TURN TRACKING
+    # =====================
+    @staticmethod
+    def _turn_position(request: ModelRequest):
+        """The HumanMessage of the current turn and how many model answers the turn already has."""
+        for i in range(len(request.messages) - 1, -1, -1):
+            if isinstance(request.messages[i], HumanMessage):
+                step = sum(isinstance(m, AIMessage) for m in request.messages[i + 1:])
+                return request.messages[i], step
+        return None, 0
+
+    @staticmethod
+    def _cacheable(human: HumanMessage) -> bool:
+        return human.id is not None and not CONTEXT_WORDS.intersection(normalize(human.text).split())
+
+    def _start_turn(self, human: HumanMessage, state: dict | None):
+        if state is None:
+            with self._lock:
+                self.bypassed += 1
+            return
+        key = self._key(human.text, state)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._turns[human.id] = ("replay", key, entry[1], entry[2])
+                print(f"[CACHE] Plan replayed for: {human.text}")
+                return
+            if entry:
+                del self._entries[key] # expired
+            self.misses += 1
+            self._turns[human.id] = ("record", key)
+
+    @staticmethod
+    def _key(text: str, state: dict) -> str:
+        leds = json.dumps(state.get("leds", state), sort_keys=True)
+        return hashlib.sha256(f"{normalize(text)}\0{leds}".encode("utf-8")).hexdigest()
+
+    def _read_state_safely(self) -> dict | None:
+        try:
+            return self.read_state()
+        except Exception as e:
+            print(f"[CACHE] Device state unavailable, cache bypassed: {e}")
+            return None
+
+    async def _aread_state_safely(self) -> dict | None:
+        if self.aread_state is None:
+            return self._read_state_safely()
+        try:
+            return await self.aread_state()
+        except Exception as e:
+            print(f"[CACHE] Device state unavailable, cache bypassed: {e}")
+            return None
+
+    # =====================
+    #  REPLAY / RECORD
+    # =====================
+    def _replay(self, request: ModelRequest, human, step) -> ModelResponse | None:
+        with self._lock:
+            turn = self._turns.get(human.id) if human is not None else None
+            if not turn or turn[0] != "replay" or step >= len(turn[2]):
+                return None
+            _, key, plan, results = turn
+        if step > 0 and not self._same_results(request.messages, results[step - 1]):
+            # The device answered differently this time (error, other state): the stored answer is wrong now
+            print("[CACHE] Tool results changed, plan dropped")
+            with self._lock:
+                self._turns.pop(human.id, None)
+                self._entries.pop(key, None)
+            return None
+        with self._lock:
+            if step == len(plan) - 1:
+                self._turns.pop(human.id, None)
+        message = plan[step]
+        # Fresh tool call ids, the same plan can be replayed many times in one thread
+        tool_calls = [{**call, "id": f"{TOOL_CALL_PREFIX}{uuid.uuid4().hex}"} for call in message.tool_calls]
+        # Marked so streaming TTS knows this reply was not streamed by a model
+        return ModelResponse(result=[AIMessage(content=message.content, tool_calls=tool_calls,
+                                               response_metadata={"local_reply": True})])
+
+    @staticmethod
+    def _tool_results(messages, ai: AIMessage) -> list[ToolMessage | None]:
+        """The ToolMessage answering each tool call of `ai`, in call order (None when missing)."""
+        by_id = {m.tool_call_id: m for m in messages if isinstance(m, ToolMessage)}
+        return [by_id.get(call["id"]) for call in ai.tool_calls]
+
+    @staticmethod
+    def _failed(message: ToolMessage | None) -> bool:
+        return message is None or message.status == "error" or message.text.startswith("ERROR")
+
+    def _same_results(self, messages, expected: list[str]) -> bool:
+        last = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+        if last is None:
+            return False
+        results = self._tool_results(messages, last)
+        return not any(self._failed(m) for m in results) and [m.text for m in results] == expected
+
+    def _record(self, request: ModelRequest, human, response: ModelResponse):
+        with self._lock:
+            turn = self._turns.get(human.id) if human is not None else None
+            if not turn or turn[0] != "record":
+                return
+        final = next((m for m in response.result if isinstance(m, AIMessage)), None)
+        if final is None or final.tool_calls:
+            return # the plan goes on, stored when the final answer comes
+        with self._lock:
+            self._turns.pop(human.id, None)
+        index = request.messages.index(human)
+        turn_messages = request.messages[index + 1:]
+        plan = [m for m in turn_messages if isinstance(m, AIMessage)] + [final]
+        results = [self._tool_results(turn_messages, m) for m in plan[:-1]]
+        failed = any(self._failed(m) for step in results for m in step)
+        if len(plan) < 2 or failed:
+            return # only successful device commands: plain answers may depend on time or context
+        stored = [AIMessage(content=m.content, tool_calls=m.tool_calls) for m in plan]
+        with self._lock:
+            self._entries[turn[1]] = (time.monotonic(), stored, [[m.text for m in step] for step in results])
+            self._entries.move_to_end(turn[1])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, human):
+        with self._lock:
+            if human is not None:
+                self._turns.pop(human.id, None)
+
+    def invalidate(self):
+        """Drops every entry (e.g. after the LED setup or the system prompt changed)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -11,46 +11,118 @@
 
 
 
-from langchain.agents.middleware import AgentMiddleware, AgentState 
+from langchain.agents.middleware import AgentMiddleware, AgentState, hook_config
 from typing import Any
 from langchain.messages import HumanMessage
-from faster_whisper import WhisperModel
 from langgraph.runtime import Runtime
+from typing import TYPE_CHECKING
+import numpy as np
+from telemetry.tracing import get_tracer
+import asyncio
+
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel # imported lazily by model_registry
 
 # Class for agent state extension
 class VoiceState(AgentState):
-    audio_input: str | None = None
+    audio_input: str | np.ndarray | None = None # wav path or float32 mono 16 kHz samples
     audio_output: str | None = None #BUG NON VIENE USATO
+    text_input: str | None = None # already transcribed by a StreamingTranscriber
 
 #Middleware before model
 class SpeechToTextMiddleware(AgentMiddleware[VoiceState]):
-    def __init__(self,stt_model: WhisperModel):
+    def __init__(self,stt_model: "WhisperModel", vad=None, beam_size=5):
         self.stt_model = stt_model
+        self.vad = vad # optional VoiceActivityTrimmer
+        self.beam_size = beam_size
         super().__init__()
 
     state_schema = VoiceState
 
+    @hook_config(can_jump_to=["end"])
     def before_model(self, state: VoiceState, runtime: Runtime) -> dict[str, Any] | None:
-        audio_path = state.get("audio_input", None)
-        if audio_path:
-            print("[STT] Audio found:", audio_path)
-            text = self.speech_to_text(audio_path)
-            print("[STT] User said:", text)
-            messages = state.get("messages", []) 
-            if messages:
-                messages.append(HumanMessage(content=text))
-            else:
-                messages = [HumanMessage(content=text)]
-            state["messages"] = messages
-            return {"messages": messages, "audio_input": None}  
-        else:
+        audio = self._pending_audio(state)
+        if audio is None:
+            return self._turn_update(state, state.get("text_input", None))
+        return self._turn_update(state, self.speech_to_text(audio))
+
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state: VoiceState, runtime: Runtime) -> dict[str, Any] | None:
+        """Same as before_model, the decode runs off the event loop (the gateway serves other turns meanwhile)."""
+        audio = self._pending_audio(state)
+        if audio is None:
+            return self._turn_update(state, state.get("text_input", None))
+        return self._turn_update(state, await self.aspeech_to_text(audio))
+
+    @staticmethod
+    def _pending_audio(state: VoiceState):
+        """The audio still to decode, None when there is none or the text was already streamed."""
+        audio = state.get("audio_input", None)
+        if state.get("text_input", None) is not None:
+            return None # Streaming mode: decoded while recording, nothing left to do
+        if isinstance(audio, np.ndarray):
+            print(f"[STT] Audio found in memory: {len(audio) / 16000:.1f}s")
+        elif audio is not None:
+            print("[STT] Audio found:", audio)
+        return audio
+
+    @staticmethod
+    def _turn_update(state: VoiceState, text: str | None) -> dict[str, Any] | None:
+        # An empty transcript ("") is still this turn's input, not a missing one
+        if text is None:
             print("[STT] No audio found")
-            return None 
-        
+            return None
+        text = text.strip()
+        print("[STT] User said:", text)
+        if not text:
+            # Silence only: never reaches the LLM
+            print("[STT] Nothing said, skipping the model")
+            return {"audio_input": None, "text_input": None, "jump_to": "end"}
+        messages = state.get("messages", []) 
+        if messages:
+            messages.append(HumanMessage(content=text))
+        else:
+            messages = [HumanMessage(content=text)]
+        state["messages"] = messages
+        return {"messages": messages, "audio_input": None, "text_input": None}  
+
+
+
+    def speech_to_text(self,audio: str | np.ndarray):
+        with get_tracer().span("stt.decode") as span:
+            audio = self._trim(audio, span)
+            if audio is None:
+                return ""
+            # Whisper takes either a path or float32 samples, arrays skip the decode of the file
+            segments, _ = self.stt_model.transcribe(audio, language="en", beam_size=self.beam_size) # en, it, ecc
+            return " ".join([segment.text for segment in segments]).strip()
 
+    async def aspeech_to_text(self, audio: str | np.ndarray):
+        """
+        Models with an awaitable atranscribe() (BatchedSTTService) are awaited, so concurrent
+        turns reach the batch window together; the others decode on a worker thread.
+        """
+        atranscribe = getattr(self.stt_model, "atranscribe", None)
+        if atranscribe is None:
+            return await asyncio.to_thread(self.speech_to_text, audio)
+        with get_tracer().span("stt.decode") as span:
+            audio = await asyncio.to_thread(self._trim, audio, span)
+            if audio is None:
+                return ""
+            segments, _ = await atranscribe(audio, language="en", beam_size=self.beam_size)
+            return " ".join([segment.text for segment in segments]).strip()
 
-    def speech_to_text(self,filename: str):
-        segments, _ = self.stt_model.transcribe(filename, language="en") # en, it, ecc
-        text = " ".join([segment.text for segment in segments])
-        return text.strip()
-    
+    def _trim(self, audio: str | np.ndarray, span: dict):
+        """Cuts the silence around the speech, None when nothing is left."""
+        if self.vad:
+            if isinstance(audio, str):
+                from faster_whisper import decode_audio
+                audio = decode_audio(audio)
+            audio, removed = self.vad.trim(audio)
+            print(f"[VAD] Removed {removed} samples ({removed / self.vad.samplerate:.2f}s)")
+            span["vad_removed_s"] = removed / self.vad.samplerate
+            if len(audio) == 0:
+                return None
+        if isinstance(audio, np.ndarray):
+            span["audio_s"] = len(audio) / 16000
+        return audio
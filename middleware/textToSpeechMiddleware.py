@@ -5,16 +5,21 @@
 # Description: A langchain middleware for text to speech
 # Requirements:  
 #               pygame
+#               a TTS backend (gTTS by default, see tts/backends.py)
 # License: GNU General Public License v3.0 (GPLv3) 
 # =======================================================
 
 
-from langchain.agents.middleware import AgentMiddleware, AgentState 
-from typing import Any
+from langchain.agents.middleware import AgentMiddleware, AgentState, ModelRequest, ModelResponse
+from typing import Any, Awaitable, Callable
 from langgraph.runtime import Runtime
-import pygame.mixer
-from gtts import gTTS
 from langchain.messages import AIMessage
+from tts.backends import TTSBackend, GTTSBackend
+from tts.sentence_pipeline import SentencePipeline, StreamingSpeechHandler
+from tts.playback import get_player, on_barge_in
+from telemetry.tracing import get_tracer
+import os
+import tempfile
 
 # Class for agent state extension
 class VoiceState(AgentState):
@@ -22,7 +27,44 @@ class VoiceState(AgentState):
     audio_output: str | None = None #BUG NON VIENE USATO
 # Middleware after model
 class TextToSpeechMiddleware(AgentMiddleware):
+    def __init__(self, backend: TTSBackend | None = None, cache=None, streaming=False):
+        self.backend = backend or GTTSBackend()
+        self.cache = cache # optional TTSCache, repeated phrases skip the synthesis
+        # Streaming mode: the chat model streams into stream_handler (see wrap_model_call),
+        # sentences are spoken while the model is still generating
+        self.pipeline = None
+        self.stream_handler = None
+        # Answers synthesized into their own temporary file, deleted by the player once played
+        self._temporary = set()
+        self._not_streaming = set() # chat model classes already reported as unable to stream
+        if streaming:
+            self.pipeline = SentencePipeline(
+                synthesize=self.text_to_speech,
+                play=self.play_audio
+            )
+            self.stream_handler = StreamingSpeechHandler(self.pipeline)
+            on_barge_in(self.pipeline.cancel)
+        super().__init__()
     
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        return handler(self._streaming_request(request))
+
+    async def awrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Awaitable[ModelResponse]]) -> ModelResponse:
+        return await handler(self._streaming_request(request))
+
+    def _streaming_request(self, request: ModelRequest) -> ModelRequest:
+        if not self.stream_handler:
+            return request
+        # Per-call copy of the shared chat model that streams its tokens into the sentence pipeline
+        update = {"callbacks": [self.stream_handler]}
+        model_class = type(request.model)
+        if "streaming" in model_class.model_fields:
+            update["streaming"] = True
+        elif model_class not in self._not_streaming:
+            self._not_streaming.add(model_class)
+            print(f"⚠️ [TTS] {model_class.__name__} has no streaming option, its answers are spoken once complete")
+        return request.override(model=request.model.model_copy(update=update))
+
     def after_model(self, state: VoiceState, runtime: Runtime) -> dict[str, Any] | None:
 
         last_msg = state["messages"][-1] 
@@ -37,21 +79,39 @@ class TextToSpeechMiddleware(AgentMiddleware):
                 
         if not extracted_text:
             return None
+        if self.pipeline:
+            # Already spoken sentence by sentence while the tokens arrived, except for replies
+            # that did not come from the model (intent router, response cache) or were not streamed
+            if last_msg.response_metadata.get("local_reply") or not self.stream_handler.tokens:
+                self.pipeline.speak(extracted_text)
+            return None
+        # A new file for every answer: never written over one still queued or playing
         audio_output=self.text_to_speech(extracted_text)
         print(f"[TTS] Audio generated {audio_output}")
-        self.play_audio(audio_output)
-
-    def text_to_speech(self,text: str) -> str:
-        #tts = gTTS(text=text, lang="it", slow=False)
-        tts = gTTS(text=text, lang="en", slow=False , tld="co.uk")
-        #filename = f"voice_agent_response_{int(time.time()*1000)}.mp3"
-        filename = f"voice_agent_response.mp3"
-        tts.save(filename)
-        return filename 
+        self.play_audio(audio_output) # queued, the turn does not wait for the speaker
+
+    def text_to_speech(self,text: str, filename: str | None = None) -> str:
+        with get_tracer().span("tts.synthesize", backend=self.backend.name, chars=len(text)) as span:
+            if self.cache:
+                hits = self.cache.hits
+                filename = self.cache.get_or_synthesize(
+                    text, self.backend.voice,
+                    lambda path: self.backend.synthesize(text, path),
+                    extension=self.backend.extension
+                )
+                span["cache_hit"] = self.cache.hits > hits
+                stats = self.cache.stats()
+                print(f"[TTS] Cache {stats['hits']} hits / {stats['misses']} misses, ~{stats['saved_seconds']:.1f}s saved")
+                return filename
+            if filename is None:
+                fd, filename = tempfile.mkstemp(prefix="voice_agent_response_", suffix=f".{self.backend.extension}")
+                os.close(fd)
+                self._temporary.add(filename)
+            self.backend.synthesize(text, filename)
+            return filename 
         
     def play_audio(self,filename):
-        pygame.mixer.init()
-        pygame.mixer.music.load(filename)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+        """Queues the file on the shared playback worker, returns an Event set once played."""
+        temporary = filename in self._temporary
+        self._temporary.discard(filename)
+        return get_player().play(filename, delete=temporary)
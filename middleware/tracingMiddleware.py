@@ -0,0 +1,49 @@
+# =======================================================
+# File: tracingMiddleware.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: A langchain middleware that records a timing span for every
+#              LLM call and every tool call of the turn (see telemetry/tracing.py)
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from typing import Awaitable, Callable
+from telemetry.tracing import get_tracer
+
+
+# Middleware around model and tool calls, last in the list so it times the real model call
+class TracingMiddleware(AgentMiddleware):
+    def __init__(self, tracer=None):
+        self.tracer = tracer or get_tracer()
+        super().__init__()
+
+    def wrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], ModelResponse]) -> ModelResponse:
+        with self.tracer.span("llm.call", model=self._model_name(request)) as span:
+            response = handler(request)
+            span["tool_calls"] = self._tool_calls(response)
+            return response
+
+    async def awrap_model_call(self, request: ModelRequest, handler: Callable[[ModelRequest], Awaitable[ModelResponse]]) -> ModelResponse:
+        with self.tracer.span("llm.call", model=self._model_name(request)) as span:
+            response = await handler(request)
+            span["tool_calls"] = self._tool_calls(response)
+            return response
+
+    def wrap_tool_call(self, request, handler):
+        with self.tracer.span("tool.call", tool=request.tool_call["name"]):
+            return handler(request)
+
+    async def awrap_tool_call(self, request, handler):
+        with self.tracer.span("tool.call", tool=request.tool_call["name"]):
+            return await handler(request)
+
+    @staticmethod
+    def _model_name(request: ModelRequest) -> str:
+        model = request.model
+        return getattr(model, "model", None) or getattr(model, "model_name", None) or type(model).__name__
+
+    @staticmethod
+    def _tool_calls(response: ModelResponse) -> int:
+        return sum(len(getattr(message, "tool_calls", None) or []) for message in response.result)
@@ -0,0 +1,97 @@
+# =======================================================
+# File: model_registry.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Process-wide registry of the heavy models (Whisper, Gemini).
+#              Models are imported and loaded only on first use and shared by everyone
+#              (gui, robot_main, agent factory), so each one is loaded once per process.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from dotenv import load_dotenv
+import os
+import threading
+
+load_dotenv()
+
+_lock = threading.Lock()
+_models = {}
+
+
+def get_stt_model(model_name=None, device=None, compute_type=None):
+    """Returns the shared WhisperModel, loading it on first use (WHISPER_* settings by default)."""
+    model_name = model_name or os.getenv("WHISPER_MODEL", "small")
+    device = device or os.getenv("WHISPER_DEVICE", "cpu")
+    compute_type = compute_type or os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+    key = ("stt", model_name, device, compute_type)
+
+    # The lock makes concurrent callers wait for the first load instead of loading twice
+    with _lock:
+        if key not in _models:
+            from faster_whisper import WhisperModel
+            _models[key] = WhisperModel(model_name, device=device, compute_type=compute_type)
+            print(f"Whisper model loaded {model_name} on {device} ({compute_type})")
+        return _models[key]
+
+
+def get_stt_service():
+    """Returns the shared micro-batching STT service (WHISPER_BATCH_SIZE, WHISPER_BATCH_WAIT_MS)."""
+    stt_model = get_stt_model() # outside the lock, get_stt_model takes it too
+    with _lock:
+        if "stt_service" not in _models:
+            from stt.batch_scheduler import BatchedSTTService
+            max_batch_size = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+            max_wait_ms = float(os.getenv("WHISPER_BATCH_WAIT_MS", "50"))
+            beam_size = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+            _models["stt_service"] = BatchedSTTService(stt_model, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                                       beam_size=beam_size)
+            print(f"Whisper batching enabled (up to {max_batch_size} utterances, {max_wait_ms} ms window)")
+        return _models["stt_service"]
+
+
+def get_stt_cascade():
+    """
+    Returns the shared cascade: WHISPER_CASCADE_MODEL decodes first, WHISPER_MODEL re-decodes the segments
+    below WHISPER_CASCADE_LOGPROB or above WHISPER_CASCADE_NO_SPEECH.
+    """
+    fast_model = get_stt_model(model_name=os.getenv("WHISPER_CASCADE_MODEL", "tiny"))
+    accurate_model = get_stt_model()
+    with _lock:
+        if "stt_cascade" not in _models:
+            from stt.cascade import CascadeTranscriber
+            _models["stt_cascade"] = CascadeTranscriber(
+                fast_model, accurate_model,
+                logprob_threshold=float(os.getenv("WHISPER_CASCADE_LOGPROB", "-0.7")),
+                no_speech_threshold=float(os.getenv("WHISPER_CASCADE_NO_SPEECH", "0.5")),
+            )
+        return _models["stt_cascade"]
+
+
+def get_chat_model(model_name="gemini-2.5-flash", temperature=0):
+    """Returns the shared Gemini chat model, building the client on first use."""
+    key = ("chat", model_name, temperature)
+    with _lock:
+        if key not in _models:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("❌ GEMINI_API_KEY not found. Check your .env file.")
+            _models[key] = ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key, temperature=temperature)
+        return _models[key]
+
+
+def warmup_stt_model(**kwargs):
+    """Loads the Whisper model and runs a dummy decode, so the first real turn is not slowed down."""
+    import numpy as np
+    model = get_stt_model(**kwargs)
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en")
+    list(segments) # transcribe is lazy, consume the generator to really decode
+    return model
+
+
+def warmup_stt_async(**kwargs) -> threading.Thread:
+    """Warms the Whisper model on a background thread (e.g. while the UI comes up)."""
+    thread = threading.Thread(target=warmup_stt_model, kwargs=kwargs, daemon=True)
+    thread.start()
+    return thread
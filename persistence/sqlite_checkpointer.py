@@ -0,0 +1,111 @@
+# =======================================================
+# File: persistence/sqlite_checkpointer.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: File-backed checkpointer with bounded retention, conversations survive restarts
+#              and only the last N checkpoints of every thread are kept on disk.
+# Requirements:
+#               langgraph-checkpoint-sqlite
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.memory import InMemorySaver
+import asyncio
+import os
+import sqlite3
+
+
+# Turn inputs consumed by SpeechToTextMiddleware, a float32 utterance is hundreds of KB
+TRANSIENT_CHANNELS = frozenset({"audio_input", "text_input"})
+
+
+def _without_transient(values: dict) -> dict:
+    """Channel values without the turn inputs, also inside the graph input (the __start__ channel)."""
+    values = {k: v for k, v in values.items() if k not in TRANSIENT_CHANNELS}
+    if isinstance(values.get("__start__"), dict):
+        values["__start__"] = {k: v for k, v in values["__start__"].items() if k not in TRANSIENT_CHANNELS}
+    return values
+
+
+class RetentionSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver that keeps only the newest `keep_last` checkpoints (and their writes) per thread.
+    Older ones are deleted right after the new checkpoint is committed, in a second short
+    transaction (a crash in between only leaves a few extra checkpoints, pruned by the next
+    put), so the database stops growing and SQLite reuses the freed pages.
+    The turn inputs (TRANSIENT_CHANNELS, e.g. the raw audio samples) are consumed by the first
+    step of the turn and are never written to disk.
+    The async methods run the sync ones in a worker thread, so the saver also works
+    with ainvoke (gateway.py); the connection is shared behind SqliteSaver's lock.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, keep_last=20, **kwargs):
+        super().__init__(conn, **kwargs)
+        if keep_last < 1:
+            raise ValueError("keep_last must be at least 1")
+        self.keep_last = keep_last
+        # WAL + NORMAL: one fsync per checkpoint instead of two, still safe on application crash
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    @classmethod
+    def from_path(cls, path: str, keep_last=20) -> "RetentionSqliteSaver":
+        return cls(sqlite3.connect(path, check_same_thread=False), keep_last=keep_last)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        checkpoint = {**checkpoint, "channel_values": _without_transient(checkpoint.get("channel_values", {}))}
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._prune(str(config["configurable"]["thread_id"]), config["configurable"]["checkpoint_ns"])
+        return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        writes = [(channel, None if channel in TRANSIENT_CHANNELS else value) for channel, value in writes]
+        return super().put_writes(config, writes, task_id, task_path)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        with self.cursor() as cur:
+            # checkpoint ids are time ordered (uuid6): the keep_last-th newest is the cutoff
+            cur.execute(
+                "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+                (thread_id, checkpoint_ns, self.keep_last - 1),
+            )
+            row = cur.fetchone()
+            if row is None:
+                return
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, row[0]),
+                )
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def load_checkpointer():
+    """
+    Returns the checkpointer configured in .env: a RetentionSqliteSaver on CHECKPOINT_DB
+    keeping CHECKPOINT_KEEP_LAST checkpoints per thread, or an InMemorySaver when CHECKPOINT_DB is empty.
+    """
+    path = os.getenv("CHECKPOINT_DB", "")
+    if not path:
+        return InMemorySaver()
+    keep_last = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+    print(f"Checkpoints saved in {path} (last {keep_last} per thread)")
+    return RetentionSqliteSaver.from_path(path, keep_last=keep_last)
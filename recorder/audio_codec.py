@@ -0,0 +1,178 @@
+# =======================================================
+# File: recorder/audio_codec.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Compressed utterance upload for remote microphones: the recorder encodes
+#              the captured samples (FLAC lossless or Opus low bitrate), the gateway decodes
+#              the upload chunk by chunk, while it arrives, straight into the float32
+#              buffer SpeechToTextMiddleware consumes.
+# Requirements:
+#               numpy, av (PyAV, already installed with faster-whisper)
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import io
+import os
+import queue
+import threading
+import numpy as np
+
+# "pcm" (raw int16, no CPU cost), "flac" (lossless, fewer bytes) or "opus" (lossy, about a tenth of the bytes)
+UPLOAD_CODEC = os.getenv("UPLOAD_CODEC", "flac")
+UPLOAD_OPUS_BITRATE = int(os.getenv("UPLOAD_OPUS_BITRATE", "24000"))
+
+# codec -> (container, encoder, Content-Type)
+CODECS = {
+    "pcm": (None, None, "audio/L16"),
+    "flac": ("flac", "flac", "audio/flac"),
+    "opus": ("ogg", "libopus", "audio/ogg; codecs=opus"),
+}
+RAW_PCM_TYPES = ("audio/l16", "application/octet-stream")
+
+
+def encode_audio(audio: np.ndarray, samplerate=16000, codec=UPLOAD_CODEC, bitrate=UPLOAD_OPUS_BITRATE) -> tuple[bytes, str]:
+    """Encodes float32 or int16 samples (first channel), returns the body and its Content-Type."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown upload codec '{codec}', expected one of {', '.join(CODECS)}")
+    container_format, encoder, content_type = CODECS[codec]
+    audio = audio[:, 0] if audio.ndim > 1 else audio
+    if audio.dtype == np.int16:
+        pcm = audio.astype("<i2", copy=False)
+    else:
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    if codec == "pcm":
+        return pcm.tobytes(), f"{content_type}; rate={samplerate}"
+
+    import av # lazy, only the devices that compress need it
+    buffer = io.BytesIO()
+    with av.open(buffer, mode="w", format=container_format) as container:
+        stream = container.add_stream(encoder, rate=samplerate, layout="mono")
+        if codec == "opus":
+            stream.bit_rate = bitrate
+        frame = av.AudioFrame.from_ndarray(pcm[None, :], format="s16", layout="mono")
+        frame.sample_rate = samplerate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None): # flush
+            container.mux(packet)
+    return buffer.getvalue(), content_type
+
+
+def _pcm_rate(params, default) -> int:
+    """The rate= parameter of an audio/L16 Content-Type (RFC 2586), `default` when missing."""
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "rate":
+            try:
+                rate = int(value.strip().strip('"'))
+            except ValueError:
+                rate = 0
+            if not 1000 <= rate <= 384000:
+                raise ValueError(f"Not a valid PCM sample rate: {value.strip()}")
+            return rate
+    return default
+
+
+class _ChunkReader:
+    """File-like object for PyAV fed from another thread: read() blocks until a chunk arrives."""
+
+    def __init__(self):
+        self._chunks = queue.Queue()
+        self._pending = b""
+        self._closed = False
+
+    def put(self, chunk: bytes | None):
+        self._chunks.put(chunk)
+
+    def read(self, size=-1) -> bytes:
+        while not self._pending and not self._closed:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._closed = True
+            else:
+                self._pending = chunk
+        size = len(self._pending) if size is None or size < 0 else size
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+class StreamingDecoder:
+    """
+    feed() the upload as it arrives, result() returns float32 mono samples at `samplerate`.
+    Raw PCM is converted chunk by chunk (at the rate= of its Content-Type, resampled at the
+    end when it is not `samplerate`); any other format is decoded by PyAV on a worker
+    thread, frame by frame, while the next chunks are still being received. The samples
+    are written into one growing buffer, no list of frames is concatenated at the end.
+    """
+
+    def __init__(self, content_type: str | None, samplerate=16000):
+        self.samplerate = samplerate
+        media_type, *params = (content_type or "").split(";")
+        self.raw = media_type.strip().lower() in RAW_PCM_TYPES
+        self.raw_rate = _pcm_rate(params, samplerate) if self.raw else None
+        self.bytes = 0
+        self._buffer = np.empty(samplerate * 10, dtype=np.float32)
+        self._size = 0
+        self._carry = b"" # odd byte of a raw chunk, int16 samples may span two chunks
+        self._error = None
+        self._reader = None
+        self._worker = None
+        self._closed = False
+        if not self.raw:
+            self._reader = _ChunkReader()
+            self._worker = threading.Thread(target=self._decode, name="upload-decoder", daemon=True)
+            self._worker.start()
+
+    def feed(self, chunk: bytes):
+        self.bytes += len(chunk)
+        if not self.raw:
+            self._reader.put(chunk)
+            return
+        chunk = self._carry + chunk
+        usable = len(chunk) - len(chunk) % 2
+        self._carry = chunk[usable:]
+        self._append(np.frombuffer(chunk[:usable], dtype="<i2"), scale=1 / 32768.0)
+
+    def close(self):
+        """Ends the input: the decoder worker finishes with what it has. Call it when an upload is aborted."""
+        if self._worker and not self._closed:
+            self._closed = True
+            self._reader.put(None)
+
+    def result(self) -> np.ndarray:
+        """Blocks until the whole upload is decoded."""
+        if self._worker:
+            self.close()
+            self._worker.join()
+        if self._error:
+            raise ValueError(f"Could not decode the audio: {self._error}")
+        audio = self._buffer[:self._size]
+        if self.raw and self.raw_rate != self.samplerate and len(audio):
+            # Linear interpolation is enough for speech going to Whisper
+            duration = len(audio) / self.raw_rate
+            target = np.arange(int(duration * self.samplerate)) / self.samplerate
+            audio = np.interp(target, np.arange(len(audio)) / self.raw_rate, audio).astype(np.float32)
+        return audio
+
+    def _append(self, samples: np.ndarray, scale=1.0):
+        end = self._size + len(samples)
+        if end > len(self._buffer):
+            grown = np.empty(max(end, 2 * len(self._buffer)), dtype=np.float32)
+            grown[:self._size] = self._buffer[:self._size]
+            self._buffer = grown
+        np.multiply(samples, scale, out=self._buffer[self._size:end], casting="unsafe")
+        self._size = end
+
+    def _decode(self):
+        import av # lazy, faster-whisper depends on it anyway
+        try:
+            with av.open(self._reader, mode="r") as container:
+                resampler = av.AudioResampler(format="flt", layout="mono", rate=self.samplerate)
+                for frame in container.decode(audio=0):
+                    for resampled in resampler.resample(frame):
+                        self._append(resampled.to_ndarray().reshape(-1))
+                for resampled in resampler.resample(None):
+                    self._append(resampled.to_ndarray().reshape(-1))
+        except Exception as e:
+            self._error = e
@@ -10,41 +10,75 @@
 
 import sounddevice as sd
 import wave
+from telemetry.tracing import get_tracer
+from recorder.capture_engine import CaptureEngine
+from recorder.audio_codec import encode_audio
+from tts.playback import barge_in
 
 class AudioRecorder:
-    def __init__(self, filename="recording.wav", samplerate=16000, channels=1, dtype="int16"):
+    def __init__(self, filename="recording.wav", samplerate=16000, channels=1, dtype="int16", transcriber=None, in_memory=False, codec=None):
         self.filename = filename
         self.samplerate = samplerate
         self.channels = channels
-        self.dtype = dtype
+        # In memory mode captures float32 directly, that is what Whisper wants
+        self.in_memory = in_memory
+        self.dtype = "float32" if in_memory else dtype
         self.is_recording = False
-        self.recording = []
+        # Preallocated ring with pre-roll and a maximum length (see capture_engine.py)
+        self.engine = CaptureEngine(samplerate=samplerate, channels=channels, dtype=self.dtype)
+        # Optional StreamingTranscriber, decodes while the user is still talking
+        self.transcriber = transcriber
+        # Optional upload codec (see audio_codec.py): every utterance is also encoded for a remote gateway
+        self.codec = codec
+        self.upload = None # (body, Content-Type) of the last utterance when codec is set
+        self.turn_id = None # the turn of the last utterance, started by stop_recording
         
     def _callback(self, indata, frames, time_info, status):
-        if self.is_recording:
-            self.recording.append(indata.copy().tobytes())
+        # Always written: the ring keeps the pre-roll for the next key press
+        self.engine.write(indata)
 
     def start_recording(self):
         if not self.is_recording:
             print("▶️ Start recording...")
+            barge_in() # the user talks over the answer, stop it
+            if self.transcriber:
+                self.transcriber.start()
+            self.engine.start(tap=self.transcriber.feed if self.transcriber else None)
             self.is_recording = True
-            self.recording = []
 
     def stop_recording(self):
         if self.is_recording:
             print("⏹ Stop recording")
             self.is_recording = False
-            self._save_file()
-            return self.filename
+            tracer = get_tracer()
+            self.turn_id = tracer.start_turn()
+            with tracer.span("record.stop", in_memory=self.in_memory):
+                audio = self.engine.stop()
+                if self.codec:
+                    self.upload = self._encode(audio)
+                if self.in_memory:
+                    return self._get_audio(audio)
+                self._save_file(audio)
+                return self.filename
         return None
 
-    def _save_file(self):
-        audio_bytes = b''.join(self.recording)
-        with wave.open(self.filename, "wb") as f:
-            f.setnchannels(self.channels)
-            f.setsampwidth(2 if self.dtype=="int16" else 4)
-            f.setframerate(self.samplerate)
-            f.writeframes(audio_bytes)
+    def _encode(self, audio) -> tuple[bytes, str]:
+        with get_tracer().span("upload.encode", codec=self.codec) as span:
+            body, content_type = encode_audio(audio, samplerate=self.samplerate, codec=self.codec)
+            span["bytes"] = len(body)
+        return body, content_type
+
+    def _get_audio(self, audio):
+        """Returns the recording as a mono float32 array at self.samplerate (no WAV round-trip)."""
+        return audio.reshape(-1) if self.channels == 1 else audio.mean(axis=1)
+
+    def _save_file(self, audio):
+        with get_tracer().span("wav.write", bytes=audio.nbytes):
+            with wave.open(self.filename, "wb") as f:
+                f.setnchannels(self.channels)
+                f.setsampwidth(2 if self.dtype=="int16" else 4)
+                f.setframerate(self.samplerate)
+                f.writeframes(audio) # the captured array is written as is, no bytes copy
         print(f"✅ File saved: {self.filename}")
 
     def start_stream(self):
@@ -0,0 +1,97 @@
+# =======================================================
+# File: recorder/capture_engine.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Preallocated NumPy ring buffer shared by the recorders: the audio callback
+#              copies every block once into the ring, utterances are bounded and include
+#              a pre-roll (the audio captured just before push-to-talk was pressed).
+# Requirements:
+#               numpy
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import os
+import threading
+import numpy as np
+
+# Longest utterance, the audio after it is dropped until the key is released
+RECORD_MAX_SECONDS = float(os.getenv("RECORD_MAX_SECONDS", "30"))
+# Audio kept from before the key press, speech starting with the press is not clipped
+RECORD_PRE_ROLL_MS = float(os.getenv("RECORD_PRE_ROLL_MS", "300"))
+
+
+class CaptureEngine:
+    """
+    The stream writes into the ring all the time, so the last `pre_roll_seconds` are
+    always available. start() marks the beginning of an utterance (pre-roll included),
+    stop() copies it out. The memory never grows: an utterance longer than
+    `max_seconds` is truncated. An optional tap (e.g. StreamingTranscriber.feed) receives
+    the pre-roll and then every recorded block, in order.
+    """
+
+    def __init__(self, samplerate=16000, channels=1, dtype="int16",
+                 max_seconds=RECORD_MAX_SECONDS, pre_roll_seconds=RECORD_PRE_ROLL_MS / 1000):
+        self.samplerate = samplerate
+        self.pre_roll = int(pre_roll_seconds * samplerate)
+        self.max_samples = int(max_seconds * samplerate)
+        self.capacity = self.pre_roll + self.max_samples
+        self.buffer = np.zeros((self.capacity, channels), dtype=dtype)
+        self._written = 0 # samples written since the stream started, the ring index is _written % capacity
+        self._start = None # sample where the current utterance starts, None when not recording
+        self._tap = None
+        self._lock = threading.Lock()
+        self.truncated = False
+
+    @property
+    def is_recording(self) -> bool:
+        return self._start is not None
+
+    def write(self, indata: np.ndarray) -> bool:
+        """Called from the audio callback. Returns False when the block was dropped (utterance too long)."""
+        with self._lock:
+            frames = len(indata)
+            if self._start is not None and self._written + frames - self._start > self.capacity:
+                if not self.truncated:
+                    print(f"⚠️ Utterance longer than {self.max_samples / self.samplerate:.0f}s, the rest is dropped")
+                self.truncated = True
+                return False
+            if frames > self.capacity:
+                indata = indata[-self.capacity:]
+                self._written += frames - self.capacity
+                frames = self.capacity
+            # The only copy of the block: straight into the preallocated ring
+            index = self._written % self.capacity
+            first = min(frames, self.capacity - index)
+            self.buffer[index:index + first] = indata[:first]
+            self.buffer[:frames - first] = indata[first:]
+            self._written += frames
+            if self._start is not None and self._tap:
+                self._tap(indata)
+            return True
+
+    def start(self, tap=None):
+        """Starts an utterance, the pre-roll goes to the tap right away."""
+        with self._lock:
+            self._start = max(0, self._written - self.pre_roll)
+            self.truncated = False
+            self._tap = tap
+            if tap and self._written > self._start:
+                tap(self._read(self._start, self._written))
+
+    def stop(self) -> np.ndarray:
+        """Ends the utterance and returns it as a (frames, channels) array."""
+        with self._lock:
+            if self._start is None:
+                return self.buffer[:0].copy()
+            audio = self._read(self._start, self._written)
+            self._start = None
+            self._tap = None
+            return audio
+
+    def _read(self, start, end) -> np.ndarray:
+        index = start % self.capacity
+        frames = end - start
+        if index + frames <= self.capacity:
+            return self.buffer[index:index + frames].copy()
+        return np.concatenate((self.buffer[index:], self.buffer[:index + frames - self.capacity]))
@@ -0,0 +1,68 @@
+# =======================================================
+# File: remote_mic.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Remote microphone for gateway.py: push to talk on an IoT device,
+#              the utterance is sent to the agent host and the answer is spoken locally.
+# Requirements:
+#               pynput, sounddevice, requests, a TTS backend (see tts/backends.py)
+#               av (PyAV) for the compressed upload (UPLOAD_CODEC=flac or opus)
+#               a speaker and a microphone
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+from dotenv import load_dotenv
+import os, socket, time, requests
+
+from robot_recorder.audio_recorder import Push2Rec
+from recorder.audio_codec import UPLOAD_CODEC
+from middleware.textToSpeechMiddleware import TextToSpeechMiddleware
+from tts.backends import load_tts_backend
+from tts.tts_cache import load_tts_cache
+
+load_dotenv()
+
+GATEWAY_URL = os.getenv("GATEWAY_URL", "http://127.0.0.1:8080")
+DEVICE_ID = os.getenv("DEVICE_ID", socket.gethostname())
+
+
+def send_utterance(session: requests.Session, body: bytes, content_type: str) -> dict:
+    """Posts the encoded utterance (UPLOAD_CODEC), returns the gateway answer."""
+    while True:
+        response = session.post(f"{GATEWAY_URL}/voice/{DEVICE_ID}", data=body,
+                                headers={"Content-Type": content_type}, timeout=60)
+        if response.status_code != 503:
+            response.raise_for_status()
+            return response.json()
+        # Backpressure: the gateway is full, retry after the suggested delay
+        delay = float(response.headers.get("Retry-After", "1"))
+        print(f"⏳ Gateway busy, retrying in {delay}s...")
+        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    print(f"🎤 Remote microphone '{DEVICE_ID}' -> {GATEWAY_URL} ({UPLOAD_CODEC} upload)")
+    tts = TextToSpeechMiddleware(backend=load_tts_backend(), cache=load_tts_cache())
+    session = requests.Session()
+    rec = Push2Rec(in_memory=True, codec=UPLOAD_CODEC)
+    rec.start_stream()
+    print("🎤 Press Space for record...")
+
+    try:
+        while True:
+            # Sleeps until the recorder emits a completed utterance
+            utterance = rec.utterances.get()
+            try:
+                answer = send_utterance(session, *utterance.upload)
+            except requests.exceptions.RequestException as e:
+                print(f"ERROR: Could not reach the gateway. Details: {e}")
+                continue
+            print("🗣️ You said:", answer["transcript"])
+            print("🤖 Agent said:", answer["reply"])
+            if answer["reply"]:
+                tts.play_audio(tts.text_to_speech(answer["reply"]))
+
+    except KeyboardInterrupt:
+        rec.stop_stream()
+        print("")
+        print("👋 Goodbye.")
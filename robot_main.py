@@ -14,114 +14,87 @@
 # License: GNU General Public License v3.0 (GPLv3) 
 # =======================================================
 
-from langchain.agents import create_agent
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain.agents.middleware import AgentMiddleware, AgentState 
-from langchain.messages import AIMessage
-from langgraph.runtime import Runtime
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.tools import tool
-from typing import Literal
-from dotenv import load_dotenv
-import time,os,requests
-from middleware.speechToTextMiddleware import SpeechToTextMiddleware
-from middleware.textToSpeechMiddleware import TextToSpeechMiddleware
-
-# Text to speech --> Speech to text
-from faster_whisper import WhisperModel
+# Agent, models and settings are shared with gui.py: Whisper and Gemini are loaded once, lazily
+from agent import get_agent, load_stt_model, load_speech_to_text, load_streaming_transcriber, AUDIO_IN_MEMORY
+from model_registry import warmup_stt_async
+from telemetry.tracing import get_tracer
+import queue
+import threading
+import time
 
 # Push2Rec class
 from robot_recorder.audio_recorder import Push2Rec
 
 #Langfuse not working
 #from langfuse.langchain import CallbackHandler 
-
-# Load variable from .env
-load_dotenv()
-
 #LANGFUSE_PUBLIC_KEY=os.getenv("LANGFUSE_PUBLIC_KEY")
-LED_API_URL = os.getenv("LED_API_BASE_URL", "http://127.0.0.1:8000/led")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-
-if not GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY not found. Check your .env file.")
-
-
 #langfuse_handler = CallbackHandler(public_key=LANGFUSE_PUBLIC_KEY)
 
-# Class for agent state extension
-class VoiceState(AgentState):
-    audio_input: str | None = None
-    audio_output: str | None = None #BUG NON VIENE USATO
-
-stt_model_name = os.getenv("WHISPER_MODEL", "small")
-stt_device = os.getenv("WHISPER_DEVICE", "cpu")
-stt_compute_type = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
-
-stt_model = WhisperModel(
-    stt_model_name,
-    device=stt_device,
-    compute_type=stt_compute_type
-    )
-print(f"Whisper model loaded {stt_model_name} on {stt_device} with {stt_compute_type} compute type")
-
-
-
-
-
-
-@tool
-def control_led(color: Literal["red","blue"], status: Literal["high", "low"]) -> str:
-    """
-    Controls the state (on/off) and color of a physical LED
-    """
-    url = LED_API_URL 
-
-    timestamp=time.strftime("%Y-%m-%d %H:%M:%S")
-    
-    payload = {
-        "timestamp": timestamp,
-        "color": color,
-        "status": status
-    }
-
-    # Wrap the payload in a list
-    data = [payload]
-    
-    try:
-        response = requests.post(url, json=data, timeout=5)
-        response.raise_for_status() 
-        return f"LED '{color}' set to '{status}' successfully..."
-        
-    except requests.exceptions.RequestException as e:
-        return f"ERROR: Could not control the LED. Details: {e} also tried : {payload}"
-
-# ShortMemory setup
-checkpointer = InMemorySaver()
-
-# Creating the agent
-agent = create_agent(
-    #system_prompt="You are Little Jhon a funny cat",
-    system_prompt="You are Little Jhon a robot assistant for smart home and iot devices. ",
-    model=ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=GEMINI_API_KEY, temperature=0),
-    tools=[control_led],
-    response_format=None,
-    middleware=[SpeechToTextMiddleware(stt_model), TextToSpeechMiddleware()],
-    checkpointer = checkpointer
-)
-
 config = {"configurable": {"thread_id": "1"}}
 #config = {"configurable": {"thread_id": "1"},"callbacks": [langfuse_handler]}
 
 
+def transcribe_utterance(stt, utterance) -> str:
+    tracer = get_tracer()
+    with tracer.turn(utterance.turn_id):
+        if utterance.transcript:
+            # Streaming mode: only the tail is left to decode
+            with tracer.span("stt.stream_finish"):
+                return utterance.transcript()
+        return stt.speech_to_text(utterance.audio if utterance.audio is not None else utterance.path)
+
+
+def stt_worker(stt, rec: Push2Rec, transcribed: queue.Queue):
+    """Stage 1: decodes utterance N+1 while the main thread runs the agent on utterance N."""
+    while True:
+        utterance = rec.utterances.get()
+        print("🎤 Recording completed")
+        if utterance.audio is not None:
+            print(f"🎤 Audio kept in memory: {len(utterance.audio) / rec.samplerate:.1f}s")
+        elif not utterance.transcript:
+            print("🎤 Audio file saved:", utterance.path)
+        try:
+            utterance.text = transcribe_utterance(stt, utterance)
+        except Exception as e:
+            print(f"Error transcribing audio: {e}")
+            continue
+        transcribed.put(utterance) # waits while the agent is still busy with the previous one
+
+
+def on_utterance_dropped(utterance):
+    # Recorded in the traces too, so dropped commands show up next to the turn latencies
+    tracer = get_tracer()
+    with tracer.turn(utterance.turn_id):
+        tracer.record("utterance.dropped", time.time(), 0.0)
+
+
+def process_utterance(agent, utterance):
+    tracer = get_tracer()
+    try:
+        with tracer.turn(utterance.turn_id), tracer.span("turn.agent"):
+            # Already transcribed by stt_worker, the STT middleware only adds the HumanMessage
+            response = agent.invoke({"text_input": utterance.text}, config)
+    except Exception as e:
+        print(f"Error processing audio: {e}")
+        return
+
+    print("🤖 Agent said:")
+    for msg in response["messages"]:
+        msg.pretty_print()
 
 
 if __name__ == "__main__":
     print(" ⚠️ This endpoint should only be used from an iot device!! ⚠️ ")
     print(" 👨‍💻 If you are not an iot device, please run gui.py with interface. 👨‍💻 ")
-    rec = Push2Rec(filename="human_message.wav")
+    # Whisper warms up in background while the agent is built
+    warmup_stt_async()
+    agent = get_agent()
+    transcriber = load_streaming_transcriber(load_stt_model())
+    rec = Push2Rec(filename="human_message.wav", transcriber=transcriber, in_memory=AUDIO_IN_MEMORY,
+                   on_drop=on_utterance_dropped)
     rec.start_stream()
+    transcribed = queue.Queue(maxsize=1)
+    threading.Thread(target=stt_worker, args=(load_speech_to_text(), rec, transcribed), daemon=True).start()
 
     if rec.listener_failed:
         print("⚠️ Pynput listener failed, using keyboard input...")
@@ -131,28 +104,13 @@ if __name__ == "__main__":
 
 
     try:
+        # Stages overlap: the recorder keeps capturing, stt_worker decodes the next utterance
+        # while this thread runs the agent (LLM, tools) on the current one, and answers play on
+        # the playback worker (tts/playback.py). Every stage sleeps on its queue, no polling.
         while True:
-    
-            if not rec.is_recording and rec.recording:
-                print("🎤 Recording completed")
-
-
-
-                audio_file = rec.filename
-                rec.recording = []  # reset recording
-                print("🎤 Audio file saved:", audio_file)
-                print("🤖 Invoking the agent...")
-                
-                response = agent.invoke({
-                    "audio_input": audio_file,
-                },config)
-
-                print("🤖 Agent said:")
-                for msg in response["messages"]:
-                    msg.pretty_print()
-                
-            time.sleep(0.01)  #busy-wait fix
-
+            utterance = transcribed.get()
+            print("🤖 Invoking the agent...")
+            process_utterance(agent, utterance)
 
     except KeyboardInterrupt:
         rec.stop_stream()
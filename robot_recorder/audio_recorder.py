@@ -7,19 +7,60 @@
 # =======================================================
 
 
+from dataclasses import dataclass
+from typing import Callable
+import os
+import queue
 import sounddevice as sd
+import numpy as np
 import wave
 from pynput import keyboard
+from telemetry.tracing import get_tracer
+from recorder.capture_engine import CaptureEngine
+from recorder.audio_codec import encode_audio
+from tts.playback import barge_in
+
+
+# Utterances waiting for the agent, a full queue drops the new one (the device is busy)
+MAX_PENDING_UTTERANCES = 2
+
+
+@dataclass
+class Utterance:
+    """A completed recording, emitted on release."""
+    turn_id: str
+    audio: np.ndarray | None = None # in memory mode
+    path: str | None = None # WAV file otherwise
+    transcript: Callable[[], str] | None = None # streaming mode: blocks until the tail is decoded
+    upload: tuple[bytes, str] | None = None # (body, Content-Type) when the recorder has an upload codec
+    text: str | None = None # set by the consumer once the utterance is transcribed
 
 
 class Push2Rec:
-    def __init__(self, filename="recording.wav", samplerate=16000, channels=1, dtype="int16"):
+    def __init__(self, filename="recording.wav", samplerate=16000, channels=1, dtype="int16", transcriber=None, in_memory=False, codec=None, on_drop=None):
         self.filename = filename
+        # Completed utterances, consumed by the agent while the next one is recorded
+        self.utterances = queue.Queue(maxsize=MAX_PENDING_UTTERANCES)
+        # Called with the Utterance when the queue is full and it is dropped (e.g. to warn the user)
+        self.on_drop = on_drop
+        self.dropped = 0
+        # WAV files in turn: queued, in process and being written (see _next_filename)
+        self._base_filename = filename
+        self._files = 0
         self.samplerate = samplerate
         self.channels = channels
-        self.dtype = dtype
+        # In memory mode captures float32 directly, that is what Whisper wants
+        self.in_memory = in_memory
+        self.dtype = "float32" if in_memory else dtype
         self.is_recording = False
-        self.recording = []
+        # Preallocated ring with pre-roll and a maximum length (see capture_engine.py)
+        self.engine = CaptureEngine(samplerate=samplerate, channels=channels, dtype=self.dtype)
+        self.audio = None # last utterance when in_memory is enabled
+        # Optional StreamingTranscriber, decodes while the user is still talking
+        self.transcriber = transcriber
+        # Optional upload codec (see audio_codec.py): every utterance is also encoded for a remote gateway
+        self.codec = codec
+        self.turn_id = None # the turn of the last utterance, started on release
         self.listener_failed = False        
         try:
             self.listener = keyboard.Listener(on_press=self._on_press,
@@ -31,28 +72,70 @@ class Push2Rec:
             
 
     def _callback(self, indata, frames, time_info, status):
-        if self.is_recording:
-            self.recording.append(indata.copy().tobytes())
+        # Always written: the ring keeps the pre-roll for the next key press
+        self.engine.write(indata)
 
     def _on_press(self, key):
         if key == keyboard.Key.space and not self.is_recording:
             print("▶️ Start recording...")
+            barge_in() # the user talks over the answer, stop it
+            self.audio = None
+            if self.transcriber:
+                self.transcriber.start()
+            self.engine.start(tap=self.transcriber.feed if self.transcriber else None)
             self.is_recording = True
-            self.recording = []
 
     def _on_release(self, key):
         if key == keyboard.Key.space and self.is_recording:
             print("⏹ Stop recording")
             self.is_recording = False
-            self._save_file()
-
-    def _save_file(self):
-        audio_bytes = b''.join(self.recording)
-        with wave.open(self.filename, "wb") as f:
-            f.setnchannels(self.channels)
-            f.setsampwidth(2 if self.dtype=="int16" else 4)
-            f.setframerate(self.samplerate)
-            f.writeframes(audio_bytes)
+            tracer = get_tracer()
+            self.turn_id = tracer.start_turn()
+            with tracer.span("record.stop", in_memory=self.in_memory):
+                audio = self.engine.stop()
+                utterance = Utterance(turn_id=self.turn_id)
+                if self.codec:
+                    utterance.upload = self._encode(audio)
+                if self.transcriber:
+                    utterance.transcript = self.transcriber.stop()
+                if self.in_memory:
+                    self.audio = utterance.audio = self._get_audio(audio)
+                else:
+                    self.filename = utterance.path = self._next_filename()
+                    self._save_file(audio)
+            self._emit(utterance)
+
+    def _emit(self, utterance: Utterance):
+        try:
+            self.utterances.put_nowait(utterance)
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Still busy with the previous commands, utterance dropped ({self.dropped} so far)")
+            if self.on_drop:
+                self.on_drop(utterance)
+
+    def _next_filename(self) -> str:
+        root, ext = os.path.splitext(self._base_filename)
+        self._files += 1
+        return f"{root}_{self._files % (MAX_PENDING_UTTERANCES + 2)}{ext}"
+
+    def _encode(self, audio) -> tuple[bytes, str]:
+        with get_tracer().span("upload.encode", codec=self.codec) as span:
+            body, content_type = encode_audio(audio, samplerate=self.samplerate, codec=self.codec)
+            span["bytes"] = len(body)
+        return body, content_type
+
+    def _get_audio(self, audio):
+        """Returns the recording as a mono float32 array at self.samplerate (no WAV round-trip)."""
+        return audio.reshape(-1) if self.channels == 1 else audio.mean(axis=1)
+
+    def _save_file(self, audio):
+        with get_tracer().span("wav.write", bytes=audio.nbytes):
+            with wave.open(self.filename, "wb") as f:
+                f.setnchannels(self.channels)
+                f.setsampwidth(2 if self.dtype=="int16" else 4)
+                f.setframerate(self.samplerate)
+                f.writeframes(audio) # the captured array is written as is, no bytes copy
         print(f"✅ File saved: {self.filename}")
 
     def start_stream(self):
@@ -0,0 +1,124 @@
+# =======================================================
+# File: led_effects.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Asyncio effect engine for the LED server (blink, pulse, sequence).
+#              Every effect is a cancellable background task, so the server keeps
+#              answering while a pattern runs; a new command for a LED preempts its effect.
+# Requirements:
+#    python3 (asyncio), gpiozero
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+import asyncio
+
+MIN_STEP_MS = 10 # shorter steps would just keep the event loop busy
+
+
+# Effects are lists of (brightness 0..1, seconds) frames, played once per cycle
+def blink_frames(on_ms=200, off_ms=200):
+    return [(1.0, _seconds(on_ms)), (0.0, _seconds(off_ms))]
+
+
+def pulse_frames(fade_ms=1000, steps=20):
+    step = _seconds(fade_ms / steps)
+    up = [(i / steps, step) for i in range(1, steps + 1)]
+    return up + [(value, step) for value, _ in reversed(up[:-1])] + [(0.0, step)]
+
+
+def sequence_frames(steps=()):
+    if not steps:
+        raise ValueError("A sequence needs at least one step.")
+    return [(min(1.0, max(0.0, float(step.get("value", 0)))), _seconds(step.get("ms", 200))) for step in steps]
+
+
+def _seconds(ms) -> float:
+    ms = float(ms)
+    if ms < MIN_STEP_MS:
+        raise ValueError(f"Steps must last at least {MIN_STEP_MS} ms.")
+    return ms / 1000
+
+
+EFFECTS = {
+    "blink": blink_frames,
+    "pulse": pulse_frames,
+    "sequence": sequence_frames,
+}
+
+
+class EffectEngine:
+    """
+    At most one running effect per LED. set() and start() cancel the LED's current effect first.
+    An effect runs `repeat` cycles and/or for `duration_ms` (forever if neither is given, until
+    the next command for that LED) and leaves the LED off when it ends on its own.
+    With a LedStateTable, every status change is recorded there.
+    """
+
+    def __init__(self, leds: dict, state=None):
+        self.leds = leds
+        self.state = state
+        self.tasks = {}  # color -> (effect name, asyncio.Task)
+
+    def set(self, color: str, on: bool) -> bool:
+        """Sets a steady status, returns False when the LED was already there (no GPIO write)."""
+        status = 'on' if on else 'off'
+        if self.state and color not in self.tasks and self.state.get(color)['status'] == status:
+            return False
+        self.cancel(color)
+        self._write(self.leds[color], 1.0 if on else 0.0)
+        if self.state:
+            self.state.set(color, status)
+        return True
+
+    def start(self, color: str, effect: str, repeat=None, duration_ms=None, **params):
+        """Validates the effect and starts it as a background task, raises ValueError for bad parameters."""
+        if effect not in EFFECTS:
+            raise ValueError(f"Not a valid effect, use one of {list(EFFECTS)}.")
+        frames = EFFECTS[effect](**params)
+        repeat = int(repeat) if repeat is not None else None
+        duration = float(duration_ms) / 1000 if duration_ms is not None else None
+        self.cancel(color)
+        task = asyncio.get_running_loop().create_task(self._run(self.leds[color], frames, repeat, duration))
+        self.tasks[color] = (effect, task)
+        task.add_done_callback(lambda done: self._forget(color, done))
+        if self.state:
+            self.state.set(color, 'effect', effect)
+
+    def cancel(self, color: str):
+        running = self.tasks.pop(color, None)
+        if running:
+            running[1].cancel()
+
+    def running(self) -> dict:
+        return {color: effect for color, (effect, _) in self.tasks.items()}
+
+    def _forget(self, color, task):
+        if color in self.tasks and self.tasks[color][1] is task:
+            del self.tasks[color]
+            # Ended on its own (a preempted effect is no longer in self.tasks)
+            if self.state and not task.cancelled():
+                self.state.set(color, 'off')
+
+    async def _run(self, led, frames, repeat, duration):
+        # Cancellation leaves the LED alone: the preempting command sets it right after
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration if duration is not None else None
+        cycle = 0
+        while repeat is None or cycle < repeat:
+            for value, seconds in frames:
+                if deadline is not None:
+                    seconds = min(seconds, deadline - loop.time())
+                    if seconds <= 0:
+                        self._write(led, 0.0)
+                        return
+                self._write(led, value)
+                await asyncio.sleep(seconds)
+            cycle += 1
+        self._write(led, 0.0)
+
+    @staticmethod
+    def _write(led, value: float):
+        if hasattr(led, "pulse"):
+            led.value = value # PWMLED, brightness
+        else:
+            led.on() if value >= 0.5 else led.off() # plain LED, no PWM: pulse becomes a slow blink
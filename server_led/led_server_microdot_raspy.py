@@ -3,21 +3,36 @@
 # Author: Lorenzo Siena
 # Date: October 2025
 # Description: Microdot web server for remote LED control (Pin 17: Red, Pin 27: Blue).
+#              Effects (blink, pulse, sequence) run in background, see led_effects.py.
+#              GET /led/state returns the LED state with an ETag, also as a long-poll change feed.
 # Requirements: 
 #    A raspberry pi (2B or more)
 #    python3 
 #    pip install gpiozero microdot
+#    led_effects.py and led_state.py in the same folder
 # License: GNU General Public License v3.0 (GPLv3)
 # =======================================================
 
 from microdot import Microdot,redirect
-from gpiozero import LED
-from time import sleep
+from gpiozero import LED, PWMLED
+from gpiozero.exc import PinPWMUnsupported
+from led_effects import EffectEngine
+from led_state import LedStateTable
 
+MAX_LONG_POLL_S = 60
 
-#Led setup
-red = LED(17)
-blue = LED(27)
+
+#Led setup: PWM for the pulse effect, plain on/off if the pin factory has no PWM
+def make_led(pin):
+    try:
+        return PWMLED(pin)
+    except PinPWMUnsupported:
+        return LED(pin)
+
+red = make_led(17)
+blue = make_led(27)
+state = LedStateTable({'red': 'on' if red.is_lit else 'off', 'blue': 'on' if blue.is_lit else 'off'})
+effects = EffectEngine({'red': red, 'blue': blue}, state=state)
 
 app = Microdot()
 @app.route('/')
@@ -26,11 +41,16 @@ def index(request):
 
 
 @app.route('/led', methods=['POST','GET'])
-def led(request):
+async def led(request):
     """
     Endpoint for LED control 
     A valid request can be: 
     curl -X POST -H "Content-Type: application/json" -d '[{"color": "red", "status": "high"}, {"color": "blue", "status": "low"}]' "$URL"
+    A command can start an effect instead of a status (the request returns immediately):
+    {"color": "red", "effect": "blink", "on_ms": 200, "off_ms": 200, "repeat": 5}
+    {"color": "blue", "effect": "pulse", "fade_ms": 1000, "duration_ms": 10000}
+    {"color": "red", "effect": "sequence", "steps": [{"value": 1, "ms": 100}, {"value": 0.2, "ms": 300}], "repeat": 3}
+    A new command for a LED stops its running effect.
     """
 
     if request.method == 'POST':
@@ -50,30 +70,42 @@ def led(request):
                 status = command.get('status', '').lower()
 
                 # 3. Case for led type
-                if color == 'red':
-                    target_led = red
-                elif color == 'blue':
-                    target_led = blue
-                else:
+                if color not in effects.leds:
                     results.append({'color': color, 'status': 'skipped', 'message': 'Not a valid color.'})
                     continue  # Next command
 
-                # 4. Case for led status
+                # 4. Case for effect, it runs in background
+                if 'effect' in command:
+                    params = {k: v for k, v in command.items() if k not in ('color', 'status', 'effect', 'timestamp')}
+                    try:
+                        effects.start(color, str(command['effect']).lower(), **params)
+                    except (ValueError, TypeError) as e:
+                        results.append({'color': color, 'status': 'skipped', 'message': str(e)})
+                        continue
+                    action = f"EFFECT {command['effect']}"
+                    results.append({'color': color, 'status': action, 'message': 'Success'})
+                    print(f"Command executed: LED {color.upper()} {action}")
+                    continue
+
+                # 5. Case for led status, stops the running effect (no GPIO write if already there)
                 if status == 'high':
-                    target_led.on()
+                    changed = effects.set(color, True)
                     action = 'ON'
                 elif status == 'low':
-                    target_led.off()
+                    changed = effects.set(color, False)
                     action = 'OFF'
                 else:
                     results.append({'color': color, 'status': 'skipped', 'message': 'Not a valid status.'})
                     continue
 
                 # Feedback
+                if not changed:
+                    results.append({'color': color, 'status': action, 'message': 'Unchanged'})
+                    continue
                 results.append({'color': color, 'status': action, 'message': 'Success'})
                 print(f"Command executed: LED {color.upper()} set {action}") 
 
-            # 5. Return the results
+            # 6. Return the results
             return {'status': 'completed', 'results': results}
 
         except Exception as e:
@@ -81,14 +113,32 @@ def led(request):
            return {'error': f'Error during POST request: {e}'}, 500
 
     else:
-        # GET endpoint test sequence
-        for i in range(5):
-            red.on()
-            blue.on()
-            sleep(0.2) 
-            red.off()
-            blue.off()
-            sleep(0.2)
-        return "Test sequence completed."
-
-app.run(debug=True)
\ No newline at end of file
+        # GET endpoint test sequence, in background: POSTs are not blocked while it runs
+        for color in ('red', 'blue'):
+            effects.start(color, 'blink', on_ms=200, off_ms=200, repeat=5)
+        return "Test sequence started."
+
+
+@app.get('/led/state')
+async def led_state(request):
+    """
+    Current state of the LEDs, with an ETag:
+    curl -i "$URL/state"
+    Long-poll change feed: with If-None-Match and ?wait=seconds the answer waits for the next change
+    (304 if nothing changed in time):
+    curl -i -H 'If-None-Match: "3"' "$URL/state?wait=30"
+    """
+    etag = request.headers.get('If-None-Match')
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_LONG_POLL_S)
+    except ValueError:
+        return {'error': 'wait must be a number of seconds.'}, 400
+    if etag == state.etag and wait > 0:
+        await state.wait_for_change(etag, wait)
+    if etag == state.etag:
+        return '', 304, {'ETag': state.etag}
+    return state.snapshot(), 200, {'ETag': state.etag}
+
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,57 @@
+# =======================================================
+# File: led_state.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: In-memory state table of the LEDs with a version number (the ETag)
+#              and a change notification for the long-poll endpoint.
+# Requirements:
+#    python3 (asyncio)
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+import asyncio
+
+
+class LedStateTable:
+    """
+    Status of every LED: "on", "off" or "effect" (with the effect name).
+    Only real changes bump the version, so a client holding the current ETag
+    has nothing to fetch; brightness steps inside an effect are not changes.
+    """
+
+    def __init__(self, initial: dict):
+        self.leds = {color: {'status': status, 'effect': None} for color, status in initial.items()}
+        self.version = 1
+        self._changed = asyncio.Event()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def get(self, color: str) -> dict:
+        return self.leds[color]
+
+    def snapshot(self) -> dict:
+        return {'version': self.version, 'leds': {color: dict(led) for color, led in self.leds.items()}}
+
+    def set(self, color: str, status: str, effect: str | None = None) -> bool:
+        """Stores the new status, returns False (and notifies nobody) if nothing changed."""
+        new = {'status': status, 'effect': effect}
+        if self.leds[color] == new:
+            return False
+        self.leds[color] = new
+        self.version += 1
+        # Wake every long-poll waiting on the old version, the next ones wait on a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+        return True
+
+    async def wait_for_change(self, etag: str, timeout: float) -> bool:
+        """Waits until the state no longer matches `etag`, False on timeout."""
+        if etag != self.etag:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,144 @@
+# =======================================================
+# File: stt/batch_scheduler.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Shared STT service that collects concurrent utterances for a short time window
+#              and decodes them together with faster-whisper batched inference.
+# Requirements:
+#               Whisper, numpy
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from concurrent.futures import Future
+from dataclasses import replace
+import asyncio
+import queue
+import threading
+import time
+import numpy as np
+
+CLIP_SECONDS = 30 # Whisper decodes at most 30 s per batch item
+
+
+class BatchedSTTService:
+    """
+    Callers get a Future right away. A worker thread waits up to `max_wait_ms` for more
+    requests (or until `max_batch_size` are queued), then the utterances are concatenated
+    and decoded as one batch: every utterance is a clip of BatchedInferencePipeline.
+    It also exposes a WhisperModel-like transcribe(), so SpeechToTextMiddleware can use it as is,
+    and atranscribe() for async callers: a blocking transcribe() per turn would only ever batch one utterance.
+    """
+
+    def __init__(self, stt_model, max_batch_size=8, max_wait_ms=50, language="en", beam_size=5, samplerate=16000):
+        from faster_whisper import BatchedInferencePipeline
+        self.pipeline = BatchedInferencePipeline(stt_model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.language = language
+        self.beam_size = beam_size
+        self.samplerate = samplerate
+        self.batches = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, audio) -> Future:
+        """Queues a float32 16 kHz utterance (or a file path), the future resolves to its segments."""
+        if not isinstance(audio, np.ndarray):
+            from faster_whisper import decode_audio
+            audio = decode_audio(audio, sampling_rate=self.samplerate)
+        future = Future()
+        self._queue.put((audio, future))
+        return future
+
+    def transcribe(self, audio, language=None, **kwargs):
+        """Blocking, WhisperModel compatible: returns (segments, None). Per-call options are ignored."""
+        return self.submit(audio).result(), None
+
+    async def atranscribe(self, audio, language=None, **kwargs):
+        """Awaitable transcribe(): the caller's event loop keeps serving the other turns of the batch."""
+        if isinstance(audio, np.ndarray):
+            future = self.submit(audio)
+        else:
+            future = await asyncio.to_thread(self.submit, audio) # decodes the file
+        return await asyncio.wrap_future(future), None
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None) # serve this batch, then stop
+                    break
+                batch.append(item)
+
+            try:
+                results = self._transcribe_batch([audio for audio, _ in batch])
+                for (_, future), segments in zip(batch, results):
+                    future.set_result(segments)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _transcribe_batch(self, utterances: list[np.ndarray]) -> list[list]:
+        clip_size = CLIP_SECONDS * self.samplerate
+        min_clip = self.samplerate // 10 # shorter tails carry no speech
+        parts, clips, owners, offsets = [], [], [], []
+        position = 0
+        for owner, audio in enumerate(utterances):
+            for start in range(0, len(audio), clip_size):
+                clip = audio[start:start + clip_size]
+                if len(clip) < min_clip:
+                    continue
+                parts.append(clip)
+                clips.append({"start": position / self.samplerate, "end": (position + len(clip)) / self.samplerate})
+                owners.append(owner)
+                offsets.append((position - start) / self.samplerate) # buffer time -> utterance time
+                position += len(clip)
+
+        results = [[] for _ in utterances]
+        self.batches += 1
+        self.requests += len(utterances)
+        if not parts:
+            return results
+
+        segments, _ = self.pipeline.transcribe(
+            np.concatenate(parts),
+            language=self.language,
+            clip_timestamps=clips,
+            batch_size=len(clips),
+            beam_size=self.beam_size,
+        )
+        clip_starts = np.array([clip["start"] for clip in clips])
+        for segment in segments:
+            # Segment times are rounded to the ms: look up the clip slightly after the start
+            i = int(np.searchsorted(clip_starts, segment.start + 0.01, side="right")) - 1
+            results[owners[i]].append(
+                replace(segment, start=segment.start - offsets[i], end=segment.end - offsets[i])
+            )
+        return results
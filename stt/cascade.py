@@ -0,0 +1,110 @@
+# =======================================================
+# File: stt/cascade.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Confidence based cascade of two Whisper models: a fast model decodes
+#              every utterance, only its low-confidence segments are decoded again
+#              with the accurate model.
+# Requirements:
+#               Whisper, numpy
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from dataclasses import replace
+import threading
+import time
+import numpy as np
+
+PADDING_SECONDS = 0.2 # context around a re-decoded segment, Whisper cuts words at the borders
+
+
+class CascadeTranscriber:
+    """
+    WhisperModel-compatible transcribe(). A segment of the fast model escalates when its
+    avg_logprob is below `logprob_threshold` or its no_speech_prob is above
+    `no_speech_threshold`; neighbouring escalated segments are re-decoded together.
+    """
+
+    def __init__(self, fast_model, accurate_model, logprob_threshold=-0.7, no_speech_threshold=0.5, samplerate=16000):
+        self.fast_model = fast_model
+        self.accurate_model = accurate_model
+        self.logprob_threshold = logprob_threshold
+        self.no_speech_threshold = no_speech_threshold
+        self.samplerate = samplerate
+        self._lock = threading.Lock()
+        self.utterances = 0
+        self.escalated_utterances = 0
+        self.segments = 0
+        self.escalated_segments = 0
+        self.fast_seconds = 0.0
+        self.accurate_seconds = 0.0
+
+    def transcribe(self, audio, language=None, **kwargs):
+        """Returns (segments, info of the fast decode) like WhisperModel.transcribe, segments as a list."""
+        if not isinstance(audio, np.ndarray):
+            from faster_whisper import decode_audio
+            audio = decode_audio(audio, sampling_rate=self.samplerate)
+
+        start = time.perf_counter()
+        segments, info = self.fast_model.transcribe(audio, language=language, **kwargs)
+        segments = list(segments) # transcribe is lazy
+        fast_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = []
+        escalated = 0
+        for group, uncertain in self._groups(segments):
+            if not uncertain:
+                result.extend(group)
+                continue
+            escalated += len(group)
+            result.extend(self._redecode(audio, group[0].start, group[-1].end, language, **kwargs))
+        accurate_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.utterances += 1
+            self.escalated_utterances += escalated > 0
+            self.segments += len(segments)
+            self.escalated_segments += escalated
+            self.fast_seconds += fast_seconds
+            self.accurate_seconds += accurate_seconds
+        if escalated:
+            print(f"[STT] Cascade: {escalated}/{len(segments)} segments re-decoded with the accurate model")
+        return result, info
+
+    def _uncertain(self, segment) -> bool:
+        return segment.avg_logprob < self.logprob_threshold or segment.no_speech_prob > self.no_speech_threshold
+
+    def _groups(self, segments):
+        """Runs of consecutive segments with the same confidence verdict."""
+        group, uncertain = [], None
+        for segment in segments:
+            verdict = self._uncertain(segment)
+            if group and verdict != uncertain:
+                yield group, uncertain
+                group = []
+            group.append(segment)
+            uncertain = verdict
+        if group:
+            yield group, uncertain
+
+    def _redecode(self, audio, start, end, language, **kwargs) -> list:
+        first = max(0, int((start - PADDING_SECONDS) * self.samplerate))
+        last = min(len(audio), int((end + PADDING_SECONDS) * self.samplerate))
+        segments, _ = self.accurate_model.transcribe(audio[first:last], language=language, **kwargs)
+        offset = first / self.samplerate
+        # Times back on the utterance timeline
+        return [replace(s, start=s.start + offset, end=s.end + offset, words=None) for s in segments]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "utterances": self.utterances,
+                "escalated_utterances": self.escalated_utterances,
+                "escalation_rate": self.escalated_utterances / self.utterances if self.utterances else 0.0,
+                "segments": self.segments,
+                "escalated_segments": self.escalated_segments,
+                "fast_seconds": self.fast_seconds,
+                "accurate_seconds": self.accurate_seconds,
+            }
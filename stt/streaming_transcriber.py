@@ -0,0 +1,123 @@
+# =======================================================
+# File: stt/streaming_transcriber.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Incremental Whisper transcriber fed by the recorder callback,
+#              decodes completed windows while push-to-talk is still held.
+# Requirements:
+#               Whisper, numpy
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import queue
+import threading
+import numpy as np
+
+
+class StreamingTranscriber:
+    """
+    Receives audio blocks from the recorder callback and decodes them on a worker thread.
+    Every time `window_seconds` of audio are buffered, the window is cut at the quietest
+    frame of its last `search_seconds` and decoded, so when the key is released only the
+    tail is left to decode. Windows and tail are trimmed by the optional VAD like a whole
+    utterance, the ones without speech are not decoded.
+    """
+
+    def __init__(self, stt_model, samplerate=16000, window_seconds=5.0, search_seconds=1.0, language="en",
+                 beam_size=5, vad=None):
+        self.stt_model = stt_model
+        self.beam_size = beam_size
+        self.vad = vad # optional VoiceActivityTrimmer
+        self.samplerate = samplerate
+        self.window = int(window_seconds * samplerate)
+        self.search = int(search_seconds * samplerate)
+        self.frame = int(0.02 * samplerate)  # 20 ms frames for the cut search
+        self.language = language
+        self.texts = []
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        """Starts a new utterance (called when push-to-talk is pressed)."""
+        self.texts = []
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, args=(self._queue, self.texts), daemon=True)
+        self._worker.start()
+
+    def feed(self, indata):
+        """Called from the audio callback: only converts the block and queues it."""
+        if self._queue is None:
+            return
+        block = indata[:, 0] if indata.ndim > 1 else indata
+        if block.dtype == np.int16:
+            block = block.astype(np.float32) / 32768.0
+        else:
+            block = block.astype(np.float32)  # always a copy, sounddevice reuses indata
+        self._queue.put(block)
+
+    def finish(self) -> str:
+        """Decodes the remaining tail and returns the full transcript of the utterance."""
+        return self.stop()()
+
+    def stop(self):
+        """
+        Ends the utterance without waiting for the tail: returns a function that blocks
+        until the tail is decoded and returns the transcript. A new utterance can start
+        meanwhile (called when push-to-talk is released).
+        """
+        if self._queue is None:
+            return lambda: ""
+        worker, texts = self._worker, self.texts
+        self._queue.put(None)
+        self._queue = None
+
+        def transcript() -> str:
+            worker.join()
+            return " ".join(texts).strip()
+        return transcript
+
+    def _run(self, blocks: queue.Queue, texts: list):
+        chunks = []
+        pending = 0
+        while True:
+            block = blocks.get()
+            if block is None:
+                break
+            chunks.append(block)
+            pending += len(block)
+            if pending >= self.window:
+                audio = np.concatenate(chunks)
+                cut = self._find_cut(audio)
+                self._decode(audio[:cut], texts)
+                chunks = [audio[cut:]]
+                pending = len(audio) - cut
+
+        # Tail: whatever is left after the last completed window
+        if pending >= self.frame:
+            self._decode(np.concatenate(chunks), texts)
+
+    def _find_cut(self, audio: np.ndarray) -> int:
+        """Index of the quietest 20 ms frame in the last `search` samples of the window."""
+        start = max(len(audio) - self.search, 0)
+        n_frames = (len(audio) - start) // self.frame
+        if n_frames < 2:
+            return len(audio)
+        frames = audio[start:start + n_frames * self.frame].reshape(n_frames, self.frame)
+        energy = np.einsum("ij,ij->i", frames, frames)
+        return start + int(np.argmin(energy)) * self.frame + self.frame // 2
+
+    def _decode(self, audio: np.ndarray, texts: list):
+        if self.vad:
+            audio, removed = self.vad.trim(audio)
+            print(f"[VAD] Removed {removed} samples ({removed / self.vad.samplerate:.2f}s)")
+            if len(audio) == 0:
+                return
+        # The previous window is passed as prompt to keep context across cuts
+        prompt = texts[-1] if texts else None
+        segments, _ = self.stt_model.transcribe(audio, language=self.language, initial_prompt=prompt,
+                                                beam_size=self.beam_size)
+        text = " ".join(segment.text for segment in segments).strip()
+        if text:
+            texts.append(text)
+        print(f"[STT] Partial ({len(audio) / self.samplerate:.1f}s):", text)
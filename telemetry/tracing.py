@@ -0,0 +1,149 @@
+# =======================================================
+# File: telemetry/tracing.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Per-stage timing spans of a voice turn (recording stop, WAV write, STT,
+#              LLM calls, tool calls, TTS synthesis, playback), tied to one turn ID.
+#              Spans are exported as JSON lines and summarized by an optional local
+#              metrics endpoint.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+
+# The turn of the code running now, LangGraph copies it into its node threads
+_current_turn = contextvars.ContextVar("turn_id", default=None)
+
+
+def percentile(values, q: float) -> float:
+    """The q quantile (0..1) with linear interpolation, the same in the metrics and in every benchmark."""
+    if len(values) == 0:
+        return 0.0
+    return float(np.percentile(values, q * 100))
+
+
+class Tracer:
+    """
+    Collects spans {turn_id, span, start (epoch s), duration_ms, ...attributes}.
+    The last `keep` spans stay in memory for summary(), every span is appended
+    to `path` as one JSON line when a path is given.
+    """
+
+    def __init__(self, path=None, keep=2000):
+        self.path = path
+        self.spans = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1, encoding="utf-8") if path else None
+
+    def start_turn(self) -> str:
+        """Creates a turn ID and makes it the current turn of this thread."""
+        turn_id = uuid.uuid4().hex[:12]
+        _current_turn.set(turn_id)
+        return turn_id
+
+    @contextmanager
+    def turn(self, turn_id: str | None):
+        """Makes `turn_id` current inside the block, for work handed to another thread."""
+        token = _current_turn.set(turn_id)
+        try:
+            yield turn_id
+        finally:
+            _current_turn.reset(token)
+
+    @staticmethod
+    def current_turn() -> str | None:
+        return _current_turn.get()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield attributes # the block can add attributes
+        finally:
+            self.record(name, start_wall, time.perf_counter() - start, **attributes)
+
+    def record(self, name: str, start: float, seconds: float, **attributes):
+        span = {"turn_id": _current_turn.get(), "span": name, "start": round(start, 6),
+                "duration_ms": round(seconds * 1000, 3), **attributes}
+        with self._lock:
+            self.spans.append(span)
+            if self._file:
+                self._file.write(json.dumps(span, default=str) + "\n")
+
+    def summary(self) -> dict:
+        """count, mean, p50, p95 and max in ms for every span name among the recent spans."""
+        with self._lock:
+            spans = list(self.spans)
+        by_name = {}
+        for span in spans:
+            by_name.setdefault(span["span"], []).append(span["duration_ms"])
+        summary = {}
+        for name, values in sorted(by_name.items()):
+            summary[name] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(percentile(values, 0.50), 3),
+                "p95_ms": round(percentile(values, 0.95), 3),
+                "max_ms": max(values),
+            }
+        return summary
+
+    def turn_spans(self, turn_id: str) -> list[dict]:
+        with self._lock:
+            return [span for span in self.spans if span["turn_id"] == turn_id]
+
+
+def serve_metrics(tracer: Tracer, port: int, host="127.0.0.1") -> ThreadingHTTPServer:
+    """Local metrics endpoint: GET /metrics (per-stage summary), GET /spans (recent spans)."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = tracer.summary()
+            elif self.path == "/spans":
+                with tracer._lock:
+                    body = list(tracer.spans)
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body, default=str).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass # no access log on the console
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer: TRACE_FILE for the JSON lines (empty = memory only), METRICS_PORT for the endpoint."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(path=os.getenv("TRACE_FILE", "") or None)
+            port = os.getenv("METRICS_PORT", "")
+            if port:
+                serve_metrics(_tracer, int(port))
+        return _tracer
@@ -0,0 +1,72 @@
+# =======================================================
+# File: tests/conftest.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Shared fixtures: the agent is built offline with a scripted chat model,
+#              a fake Whisper and an in-memory checkpointer.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import os
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+os.environ.setdefault("GEMINI_API_KEY", "test") # agent.py refuses to import without it
+os.environ.setdefault("INTENT_ROUTER", "false")
+os.environ.setdefault("VAD_AGGRESSIVENESS", "off") # the fake audio is silence
+
+PCM = (np.sin(np.arange(16000) / 10) * 8000).astype("<i2").tobytes() # 1 s of raw 16 kHz PCM
+
+
+class FakeWhisper:
+    """WhisperModel stand-in: every utterance takes `delay` seconds and says `text`."""
+
+    def __init__(self, text="what time is it", delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.last_audio = None
+        self.last_kwargs = None
+
+    def transcribe(self, audio, language=None, **kwargs):
+        self.calls += 1
+        self.last_audio = audio
+        self.last_kwargs = kwargs
+        time.sleep(self.delay) # like the real decode: blocks the calling thread
+        return [SimpleNamespace(text=f" {self.text}", start=0.0, end=1.0, avg_logprob=-0.1, no_speech_prob=0.0)], None
+
+
+@pytest.fixture
+def make_agent():
+    """Builds a voice agent that never speaks, uses the network or the GPU."""
+    from langchain.messages import AIMessage
+    from langgraph.checkpoint.memory import InMemorySaver
+    from agent import create_voice_agent
+    from benchmarks.fakes import FakeChatModel
+
+    def build(stt_model=None, answers=("It is noon.",)):
+        chat = FakeChatModel(responses=[AIMessage(content=a) for a in answers])
+        agent = create_voice_agent(stt_model=stt_model or FakeWhisper(), speak=False,
+                                   checkpointer=InMemorySaver(), chat_model=chat)
+        return agent, chat
+    return build
+
+
+@pytest.fixture
+def client(make_agent, monkeypatch):
+    """Test client of the voice gateway, serving an offline agent built around `stt_model`."""
+    from microdot.test_client import TestClient
+    import gateway
+
+    def build(stt_model):
+        agent, _ = make_agent(stt_model=stt_model)
+        monkeypatch.setattr(gateway, "agent", agent)
+        return TestClient(gateway.app)
+    return build
+
+
+async def post_voice(client, device_id, body=PCM, content_type="audio/L16; rate=16000"):
+    return await client.post(f"/voice/{device_id}", body=body, headers={"Content-Type": content_type})
@@ -0,0 +1,58 @@
+# =======================================================
+# File: tests/test_batch_scheduler.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: BatchedSTTService behind the gateway: concurrent turns share a batch.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import asyncio
+import time
+from dataclasses import dataclass
+import faster_whisper
+import pytest
+
+from stt.batch_scheduler import BatchedSTTService
+from tests.conftest import post_voice
+
+DEVICES = ["kitchen", "garage", "garden", "office"]
+
+
+@dataclass
+class FakeSegment:
+    start: float
+    end: float
+    text: str
+
+
+class FakeBatchedPipeline:
+    """BatchedInferencePipeline stand-in: one segment per clip, 0.2 s per batch whatever its size."""
+
+    def __init__(self, model):
+        self.batch_sizes = []
+
+    def transcribe(self, audio, clip_timestamps, **kwargs):
+        self.batch_sizes.append(len(clip_timestamps))
+        time.sleep(0.2)
+        return [FakeSegment(clip["start"], clip["end"], " lights on") for clip in clip_timestamps], None
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(faster_whisper, "BatchedInferencePipeline", FakeBatchedPipeline)
+    service = BatchedSTTService(stt_model=None, max_batch_size=8, max_wait_ms=100)
+    yield service
+    service.close()
+
+
+def test_concurrent_gateway_turns_share_a_batch(client, service):
+    client = client(service)
+
+    async def turns():
+        return await asyncio.gather(*(post_voice(client, device) for device in DEVICES))
+
+    responses = asyncio.run(turns())
+    assert [r.json["transcript"] for r in responses] == ["lights on"] * len(DEVICES)
+    assert service.stats()["requests"] == len(DEVICES)
+    assert service.stats()["avg_batch_size"] > 1
@@ -0,0 +1,47 @@
+# =======================================================
+# File: tests/test_checkpointer.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: RetentionSqliteSaver and HistoryTrimMiddleware: what a long conversation leaves on disk.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import numpy as np
+from langchain.agents import create_agent
+from langchain.messages import AIMessage, HumanMessage
+
+from benchmarks.fakes import FakeChatModel
+from middleware.historyTrimMiddleware import HistoryTrimMiddleware
+from middleware.speechToTextMiddleware import SpeechToTextMiddleware
+from persistence.sqlite_checkpointer import RetentionSqliteSaver
+from tests.conftest import FakeWhisper
+
+
+def build(saver, history_turns):
+    # One message object per answer: the fake returns them as they are, ids included
+    model = FakeChatModel(responses=[AIMessage(content=f"The kitchen light is on ({i}).") for i in range(20)])
+    middleware = [SpeechToTextMiddleware(FakeWhisper()), HistoryTrimMiddleware(max_turns=history_turns)]
+    return create_agent(model=model, tools=[], middleware=middleware, checkpointer=saver)
+
+
+def test_history_is_trimmed_to_the_last_turns(tmp_path):
+    saver = RetentionSqliteSaver.from_path(str(tmp_path / "db.sqlite"), keep_last=5)
+    agent = build(saver, history_turns=3)
+    config = {"configurable": {"thread_id": "kitchen"}}
+    for turn in range(10):
+        result = agent.invoke({"messages": [HumanMessage(content=f"Turn on the light, turn {turn}")]}, config)
+    humans = [m.text for m in result["messages"] if isinstance(m, HumanMessage)]
+    assert humans == [f"Turn on the light, turn {turn}" for turn in (7, 8, 9)]
+    assert len(agent.get_state(config).values["messages"]) == 6
+
+
+def test_audio_samples_are_not_persisted(tmp_path):
+    saver = RetentionSqliteSaver.from_path(str(tmp_path / "db.sqlite"), keep_last=20)
+    agent = build(saver, history_turns=3)
+    audio = np.random.default_rng(0).standard_normal(16000 * 5).astype(np.float32) # 320 KB
+    agent.invoke({"audio_input": audio}, {"configurable": {"thread_id": "kitchen"}})
+    stored = saver.conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(checkpoint)), 0) + (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes) FROM checkpoints"
+    ).fetchone()[0]
+    assert stored < audio.nbytes / 10
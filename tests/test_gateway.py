@@ -0,0 +1,120 @@
+# =======================================================
+# File: tests/test_gateway.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Voice gateway: turns of different devices run together, bad uploads are refused.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+import gateway
+from tests.conftest import PCM, FakeWhisper, post_voice
+
+DECODE_SECONDS = 0.5
+
+
+def test_turns_of_different_devices_overlap(client):
+    client = client(FakeWhisper(delay=DECODE_SECONDS))
+
+    async def two_turns():
+        start = time.perf_counter()
+        responses = await asyncio.gather(post_voice(client, "kitchen"), post_voice(client, "garage"))
+        return responses, time.perf_counter() - start
+
+    responses, elapsed = asyncio.run(two_turns())
+    assert [r.status_code for r in responses] == [200, 200]
+    assert [r.json["transcript"] for r in responses] == ["what time is it"] * 2
+    # The decodes ran together: the event loop was not blocked by the first one
+    assert elapsed < 2 * DECODE_SECONDS
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (b"definitely not audio" * 100, "audio/flac"),
+    (PCM, "audio/L16; rate=fast"),
+], ids=["garbage", "bad-rate"])
+def test_undecodable_upload_is_a_client_error(client, body, content_type):
+    whisper = FakeWhisper()
+    response = asyncio.run(post_voice(client(whisper), "kitchen", body=body, content_type=content_type))
+    assert response.status_code == 400
+    assert whisper.calls == 0
+
+
+def test_pcm_at_another_rate_is_resampled(client):
+    whisper = FakeWhisper()
+    pcm_8k = PCM[:len(PCM) // 2] # 1 s at 8 kHz
+    response = asyncio.run(post_voice(client(whisper), "kitchen", body=pcm_8k, content_type="audio/L16; rate=8000"))
+    assert response.status_code == 200
+    assert isinstance(whisper.last_audio, np.ndarray)
+    assert len(whisper.last_audio) == 16000
+
+
+def test_turns_of_one_device_are_serialized_and_locks_released(client):
+    client = client(FakeWhisper(delay=DECODE_SECONDS / 2))
+
+    async def turns():
+        start = time.perf_counter()
+        await asyncio.gather(post_voice(client, "kitchen"), post_voice(client, "kitchen"))
+        serialized = time.perf_counter() - start
+        await asyncio.gather(*(post_voice(client, f"device-{i}") for i in range(20)))
+        return serialized
+
+    assert asyncio.run(turns()) >= DECODE_SECONDS
+    assert len(gateway.device_locks) == 0 # no lock kept for devices that stopped talking
+
+
+def test_queued_turns_of_one_device_do_not_block_the_others(client, monkeypatch):
+    monkeypatch.setattr(gateway, "limiter", gateway.TurnLimiter(2, 1))
+    client = client(FakeWhisper(delay=DECODE_SECONDS))
+
+    async def timed(device_id, after=0.0):
+        await asyncio.sleep(after)
+        start = time.perf_counter()
+        response = await post_voice(client, device_id)
+        return response.status_code, time.perf_counter() - start
+
+    async def turns():
+        # The kitchen queues a second turn, the garage arrives while both are pending
+        return await asyncio.gather(timed("kitchen"), timed("kitchen"), timed("garage", after=0.05))
+
+    kitchen_1, kitchen_2, garage = asyncio.run(turns())
+    assert [kitchen_1[0], kitchen_2[0], garage[0]] == [200, 200, 200]
+    # The garage got the second slot right away instead of waiting for the first kitchen turn
+    assert garage[1] < 1.5 * DECODE_SECONDS
+
+
+class SlowStream:
+    """request.stream of a device on a bad link: one chunk, then `after` (stall or reset)."""
+
+    def __init__(self, after):
+        self.after = after
+        self.sent = False
+
+    async def read(self, size):
+        if not self.sent:
+            self.sent = True
+            return b"fLaC" + b"\0" * (size - 4)
+        if self.after == "reset":
+            raise ConnectionResetError("connection reset by peer")
+        await asyncio.sleep(3600)
+
+
+def upload_request(after):
+    return SimpleNamespace(content_type="audio/flac", content_length=64 * 1024, stream=SlowStream(after))
+
+
+@pytest.mark.parametrize("after, error", [("stall", TimeoutError), ("reset", ConnectionResetError)])
+def test_aborted_upload_releases_its_decoder(after, error):
+    async def upload():
+        with pytest.raises(error):
+            await gateway.decode_upload(upload_request(after), timeout=0.2)
+
+    asyncio.run(upload())
+    time.sleep(0.2)
+    assert not any(t.name == "upload-decoder" for t in threading.enumerate()) # no decoder left waiting
@@ -0,0 +1,39 @@
+# =======================================================
+# File: tests/test_intent_router.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Intent router: simple LED commands skip the chat model, every turn reports the counters.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents import create_agent
+from langchain.messages import AIMessage, HumanMessage
+from langchain.tools import tool
+
+from benchmarks.fakes import FakeChatModel
+from middleware.intentRouterMiddleware import IntentRouterMiddleware
+
+
+@tool
+def control_led(color: str, status: str) -> str:
+    """Turns an LED on (high) or off (low)."""
+    return f"{color} {status}"
+
+
+def test_fast_path_skips_the_model_and_reports_stats(capsys):
+    router = IntentRouterMiddleware()
+    chat = FakeChatModel(responses=[AIMessage(content="It is noon."), AIMessage(content="Anything else?")])
+    agent = create_agent(model=chat, tools=[control_led], middleware=[router])
+
+    result = agent.invoke({"messages": [HumanMessage(content="Turn on the red light, please.")]})
+    assert result["messages"][-1].text == "Done, the red light is on."
+    assert chat.i == 0 # the chat model was never called
+    assert "[ROUTER] 1/1 turns on the fast path (100%)" in capsys.readouterr().out
+
+    result = agent.invoke({"messages": [HumanMessage(content="What time is it?")]})
+    assert result["messages"][-1].text == "It is noon."
+    assert chat.i == 1
+    assert "[ROUTER] 1/2 turns on the fast path (50%)" in capsys.readouterr().out
+    stats = router.stats()
+    assert (stats["turns"], stats["hits"], stats["hit_rate"]) == (2, 1, 0.5)
@@ -0,0 +1,106 @@
+# =======================================================
+# File: tests/test_playback.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Spoken answers: every answer gets its own file, played in order and deleted
+#              afterwards; streaming TTS speaks every answer once, streamed by the model or not.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import os
+import time
+from langchain.agents import create_agent
+from langchain.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+import pytest
+
+from benchmarks.fakes import FakeChatModel
+
+from middleware.textToSpeechMiddleware import TextToSpeechMiddleware
+from tts import playback
+from tts.backends import TTSBackend
+
+
+class FakeBackend(TTSBackend):
+    name = "fake"
+    extension = "txt"
+
+    def synthesize(self, text: str, filename: str):
+        with open(filename, "w") as f:
+            f.write(text)
+
+
+class FakeMusic:
+    """pygame.mixer.music stand-in: reads the file when loaded, every file "plays" for 50 ms."""
+
+    def __init__(self):
+        self.played = []
+        self._end = 0
+
+    def load(self, path):
+        with open(path) as f:
+            self.played.append((path, f.read()))
+
+    def play(self):
+        self._end = time.monotonic() + 0.05
+
+    def get_busy(self):
+        return time.monotonic() < self._end
+
+    def stop(self):
+        self._end = 0
+
+    def unload(self):
+        pass
+
+
+@pytest.fixture
+def music(monkeypatch):
+    music = FakeMusic()
+    monkeypatch.setattr(playback.PlaybackWorker, "_init_mixer", lambda self: music)
+    monkeypatch.setattr(playback, "_player", None)
+    return music
+
+
+def test_queued_answers_are_not_overwritten(music):
+    tts = TextToSpeechMiddleware(backend=FakeBackend())
+    answers = ["First answer.", "Second answer.", "Third answer."]
+    for answer in answers:
+        tts.after_model({"messages": [AIMessage(content=answer)]}, None)
+    playback.get_player().wait()
+
+    assert [text for _, text in music.played] == answers
+    assert len({path for path, _ in music.played}) == len(answers)
+    assert not any(os.path.exists(path) for path, _ in music.played) # deleted once played
+
+
+def test_barge_in_deletes_the_dropped_answers(music):
+    tts = TextToSpeechMiddleware(backend=FakeBackend())
+    paths = [tts.text_to_speech(text) for text in ("One.", "Two.", "Three.")]
+    for path in paths:
+        tts.play_audio(path)
+    playback.barge_in()
+    playback.get_player().wait()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+class StreamingFakeChatModel(GenericFakeChatModel):
+    """Streams its answer token by token when streaming=True, like ChatGoogleGenerativeAI."""
+    streaming: bool = False
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.mark.parametrize("model", [
+    FakeChatModel(responses=[AIMessage(content="The red light is on. Anything else?")]),
+    StreamingFakeChatModel(messages=iter([AIMessage(content="The red light is on. Anything else?")])),
+], ids=["not-streaming", "streaming"])
+def test_streaming_tts_speaks_every_answer_once(music, model):
+    tts = TextToSpeechMiddleware(backend=FakeBackend(), streaming=True)
+    agent = create_agent(model=model, tools=[], middleware=[tts])
+    agent.invoke({"messages": [HumanMessage(content="Turn on the red light")]})
+    tts.pipeline.wait()
+    playback.get_player().wait()
+    assert " ".join(text for _, text in music.played) == "The red light is on. Anything else?"
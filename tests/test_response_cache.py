@@ -0,0 +1,70 @@
+# =======================================================
+# File: tests/test_response_cache.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: ResponseCacheMiddleware: a repeated command is replayed only while the
+#              tools answer as they did when it was recorded.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain.agents import create_agent
+from langchain.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+import pytest
+
+from benchmarks.fakes import FakeChatModel
+from middleware.responseCacheMiddleware import ResponseCacheMiddleware
+
+TURN_ON = {"name": "control_led", "args": {"color": "red", "status": "high"}, "id": "call_1", "type": "tool_call"}
+
+
+@pytest.fixture
+def led():
+    return {"result": "The red light is now on.", "calls": 0}
+
+
+@pytest.fixture
+def agent(led):
+    @tool
+    def control_led(color: str, status: str) -> str:
+        """Controls the state (on/off) and color of a physical LED."""
+        led["calls"] += 1
+        return led["result"]
+
+    model = FakeChatModel(responses=[
+        AIMessage(content="", tool_calls=[TURN_ON]),
+        AIMessage(content="Done, the red light is on."),
+        AIMessage(content="Sorry, the LED server is not answering."),
+    ])
+    cache = ResponseCacheMiddleware(lambda: {"leds": {"red": "off"}})
+    agent = create_agent(model=model, tools=[control_led], middleware=[cache], checkpointer=InMemorySaver())
+    return agent, model, cache
+
+
+def ask(agent, text="Turn on the red light"):
+    result = agent.invoke({"messages": [HumanMessage(content=text)]}, {"configurable": {"thread_id": "t"}})
+    return result["messages"][-1]
+
+
+def test_repeated_command_is_replayed(agent, led):
+    agent, model, cache = agent
+    ask(agent)
+    reply = ask(agent, "turn on the red light!")
+    assert reply.text == "Done, the red light is on."
+    assert reply.response_metadata.get("local_reply")
+    assert model.i == 2 # the second turn never reached the model
+    assert led["calls"] == 2 # but the tool ran again
+    assert cache.stats()["hits"] == 1
+
+
+def test_replay_stops_when_a_tool_result_changes(agent, led):
+    agent, model, cache = agent
+    ask(agent)
+    led["result"] = "ERROR: LED server answered 500"
+    reply = ask(agent)
+    # The model explains the failure, the stored success is not replayed
+    assert reply.text == "Sorry, the LED server is not answering."
+    assert not reply.response_metadata.get("local_reply")
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,27 @@
+# =======================================================
+# File: tests/test_speech_to_text.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: SpeechToTextMiddleware: what reaches the model for each kind of input.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import numpy as np
+
+
+def test_audio_input_becomes_human_message(make_agent):
+    agent, _ = make_agent()
+    result = agent.invoke({"audio_input": np.zeros(16000, dtype=np.float32)}, {"configurable": {"thread_id": "audio"}})
+    assert [m.text for m in result["messages"]] == ["what time is it", "It is noon."]
+    assert result["audio_input"] is None
+
+
+def test_empty_streamed_transcript_skips_the_model(make_agent):
+    agent, chat = make_agent(answers=("It is noon.", "It is still noon."))
+    config = {"configurable": {"thread_id": "empty"}}
+    agent.invoke({"text_input": "what time is it"}, config)
+    result = agent.invoke({"text_input": "  "}, config)
+    # Nothing said: no new answer, the previous turn is not answered again
+    assert chat.i == 1
+    assert len(result["messages"]) == 2
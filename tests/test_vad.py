@@ -0,0 +1,69 @@
+# =======================================================
+# File: tests/test_vad.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: VoiceActivityTrimmer: noise-only recordings are dropped, speech in noise is kept,
+#              also on the windows of the streaming transcriber.
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import numpy as np
+import pytest
+
+from conftest import FakeWhisper
+from stt.streaming_transcriber import StreamingTranscriber
+from stt.vad import VAD_LEVELS, VoiceActivityTrimmer
+
+SAMPLERATE = 16000
+
+
+def noise(seconds, dbfs, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SAMPLERATE)) * 10 ** (dbfs / 20)).astype(np.float32)
+
+
+def speech(seconds, dbfs):
+    """Harmonics with a syllable-rate envelope, about as peaky as a voice."""
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    envelope = 0.3 + 0.7 * np.clip(np.sin(2 * np.pi * 3 * t), 0, None)
+    voice = voice * envelope
+    return (voice / np.sqrt(np.mean(voice ** 2)) * 10 ** (dbfs / 20)).astype(np.float32)
+
+
+@pytest.mark.parametrize("aggressiveness", sorted(VAD_LEVELS))
+@pytest.mark.parametrize("dbfs", [-50, -45, -40, -30])
+def test_noise_only_recording_is_dropped(aggressiveness, dbfs):
+    trimmed, removed = VoiceActivityTrimmer(aggressiveness).trim(noise(2, dbfs))
+    assert len(trimmed) == 0
+    assert removed == 2 * SAMPLERATE
+
+
+@pytest.mark.parametrize("aggressiveness", sorted(VAD_LEVELS))
+def test_speech_in_noise_is_kept_and_trimmed(aggressiveness):
+    audio = noise(3, -45)
+    audio[SAMPLERATE:2 * SAMPLERATE] += speech(1, -20) # speech from 1 s to 2 s
+    trimmed, removed = VoiceActivityTrimmer(aggressiveness).trim(audio)
+    # The second of speech stays (plus padding), most of the noise around it goes
+    assert SAMPLERATE <= len(trimmed) <= 1.6 * SAMPLERATE
+    assert removed == len(audio) - len(trimmed)
+
+
+def test_speech_only_recording_is_kept():
+    audio = speech(1.5, -20)
+    trimmed, _ = VoiceActivityTrimmer(1).trim(audio)
+    assert len(trimmed) >= 0.9 * len(audio)
+
+
+def test_streaming_windows_are_trimmed_and_use_the_beam_size():
+    whisper = FakeWhisper()
+    transcriber = StreamingTranscriber(whisper, window_seconds=2.0, beam_size=2, vad=VoiceActivityTrimmer(1))
+    transcriber.start()
+    audio = noise(2.5, -45)
+    audio[SAMPLERATE // 2:3 * SAMPLERATE // 2] += speech(1, -20)
+    transcriber.feed(audio)
+    assert transcriber.finish() == "what time is it"
+    assert whisper.calls == 1 # the speech window, not the noise-only tail
+    assert len(whisper.last_audio) <= 1.6 * SAMPLERATE
+    assert whisper.last_kwargs["beam_size"] == 2
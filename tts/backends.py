@@ -0,0 +1,94 @@
+# =======================================================
+# File: tts/backends.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Text to speech backends used by TextToSpeechMiddleware
+# Requirements:
+#               gtts (online backend)
+#               espeak-ng (offline backend, sudo apt install espeak-ng)
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import os
+import shutil
+import subprocess
+
+
+class TTSBackend:
+    """A synthesizer that writes the speech for a text into an audio file."""
+
+    name = "base"
+    extension = "mp3"
+
+    @property
+    def voice(self) -> str:
+        """Identifies backend and voice settings, used in the TTS cache key."""
+        return self.name
+
+    def synthesize(self, text: str, filename: str):
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS, needs a network round-trip for every synthesis."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def __init__(self, lang="en", tld="co.uk"):
+        self.lang = lang
+        self.tld = tld
+
+    @property
+    def voice(self) -> str:
+        return f"{self.name}:{self.lang}:{self.tld}"
+
+    def synthesize(self, text: str, filename: str):
+        from gtts import gTTS
+        gTTS(text=text, lang=self.lang, slow=False, tld=self.tld).save(filename)
+
+
+class EspeakBackend(TTSBackend):
+    """eSpeak NG, fully local and fast enough for a Raspberry Pi."""
+
+    name = "espeak"
+    extension = "wav"
+
+    def __init__(self, voice="en-gb", speed=160, executable="espeak-ng"):
+        self.executable = shutil.which(executable) or shutil.which("espeak")
+        if self.executable is None:
+            raise RuntimeError(f"❌ {executable} not found. Install it with: sudo apt install espeak-ng")
+        self.espeak_voice = voice
+        self.speed = speed
+
+    @property
+    def voice(self) -> str:
+        return f"{self.name}:{self.espeak_voice}:{self.speed}"
+
+    def synthesize(self, text: str, filename: str):
+        subprocess.run(
+            [self.executable, "-v", self.espeak_voice, "-s", str(self.speed), "-w", filename, text],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    EspeakBackend.name: EspeakBackend,
+}
+
+
+def load_tts_backend():
+    """Returns the TTS backend selected with TTS_BACKEND (gtts or espeak) and its .env settings."""
+    backend_name = os.getenv("TTS_BACKEND", "gtts").lower()
+    if backend_name not in TTS_BACKENDS:
+        raise ValueError(f"❌ Unknown TTS_BACKEND '{backend_name}', use one of {list(TTS_BACKENDS)}")
+    if backend_name == EspeakBackend.name:
+        backend = EspeakBackend(voice=os.getenv("TTS_VOICE", "en-gb"), speed=int(os.getenv("TTS_SPEED", "160")))
+    else:
+        backend = GTTSBackend(lang=os.getenv("TTS_LANG", "en"), tld=os.getenv("TTS_TLD", "co.uk"))
+    print(f"TTS backend loaded {backend.voice}")
+    return backend
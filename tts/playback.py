@@ -0,0 +1,134 @@
+# =======================================================
+# File: tts/playback.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: One playback worker per process: the mixer is initialized once, audio files
+#              are queued and played in order on its own thread, so the agent never waits
+#              for the speaker. barge_in() (push to talk pressed) cuts the current answer.
+# Requirements:
+#               pygame
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+import os
+import queue
+import threading
+from telemetry.tracing import get_tracer
+
+POLL_SECONDS = 0.02 # how often the end of the playback is checked, on the worker thread
+
+
+class PlaybackWorker:
+    """
+    play() queues a file and returns at once with an Event set when the file is done
+    (played, interrupted or failed); with delete=True the file is removed then.
+    stop() drops the queue and cuts the current file.
+    """
+
+    def __init__(self):
+        self.generation = 0 # bumped by stop(), older queued files are dropped
+        self._queue = queue.Queue()
+        self._interrupt = threading.Event()
+        self._lock = threading.Lock()
+        self._mixer = None
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def play(self, path: str, delete=False) -> threading.Event:
+        done = threading.Event()
+        # The worker runs on its own thread, the turn ID travels with the file
+        self._queue.put((path, get_tracer().current_turn(), self.generation, done, delete))
+        return done
+
+    def stop(self):
+        with self._lock:
+            self.generation += 1
+        self._interrupt.set()
+        while True:
+            try:
+                path, _, _, done, delete = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if delete:
+                _remove(path)
+            done.set()
+            self._queue.task_done()
+
+    def wait(self):
+        """Blocks until every queued file has been played."""
+        self._queue.join()
+
+    def _init_mixer(self):
+        import pygame.mixer # lazy, pygame takes a while to import
+        pygame.mixer.init() # once per process, not once per answer
+        return pygame.mixer.music
+
+    def _worker(self):
+        while True:
+            path, turn_id, generation, done, delete = self._queue.get()
+            try:
+                self._interrupt.clear()
+                if generation != self.generation:
+                    continue # queued before a barge-in
+                if self._mixer is None:
+                    self._mixer = self._init_mixer()
+                self._play(path, turn_id, generation)
+            except Exception as e:
+                print(f"[TTS] Playback failed: {e}")
+            finally:
+                if delete:
+                    _remove(path)
+                done.set()
+                self._queue.task_done()
+
+    def _play(self, path, turn_id, generation):
+        music = self._mixer
+        music.load(path)
+        try:
+            # The span starts with the playback and ends with it
+            with get_tracer().turn(turn_id), get_tracer().span("playback") as span:
+                music.play()
+                while music.get_busy() and generation == self.generation:
+                    self._interrupt.wait(POLL_SECONDS)
+                if generation != self.generation:
+                    music.stop()
+                    span["interrupted"] = True
+                    print("[TTS] Playback interrupted")
+        finally:
+            music.unload() # the file is released, it can be deleted
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        print(f"[TTS] Could not delete {path}: {e}")
+
+
+# =====================
+#  SHARED WORKER
+# =====================
+_player = None
+_player_lock = threading.Lock()
+_barge_in_listeners = []
+
+
+def get_player() -> PlaybackWorker:
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = PlaybackWorker()
+        return _player
+
+
+def on_barge_in(callback):
+    """Registers a callback run by barge_in(), e.g. to drop sentences not synthesized yet."""
+    _barge_in_listeners.append(callback)
+
+
+def barge_in():
+    """Push to talk pressed: the answer still playing or queued is cancelled."""
+    if _player is not None:
+        _player.stop()
+    for callback in _barge_in_listeners:
+        callback()
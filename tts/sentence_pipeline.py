@@ -0,0 +1,144 @@
+# =======================================================
+# File: tts/sentence_pipeline.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Splits streamed LLM tokens into sentences and speaks them in a pipeline:
+#              while sentence N plays, sentence N+1 is synthesized.
+# Requirements:
+#               langchain
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from langchain_core.callbacks import BaseCallbackHandler
+import queue
+import re
+import threading
+import time
+from telemetry.tracing import get_tracer
+
+# End of sentence: punctuation followed by whitespace
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+class SentenceSplitter:
+    """Accumulates tokens and returns the sentences completed so far."""
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars # avoid synthesizing tiny fragments like "Ok."
+        self.buffer = ""
+
+    def feed(self, token: str) -> list[str]:
+        self.buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentence = self.buffer[start:match.start()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        sentence, self.buffer = self.buffer.strip(), ""
+        return sentence
+
+
+class SentencePipeline:
+    """
+    Two workers: one synthesizes sentences, the other hands them to the player in order.
+    The audio queue holds one sentence, so synthesis runs at most one sentence ahead
+    of playback: at most three sentences are synthesized but not played yet
+    (one in the player, one in the queue, one being synthesized).
+    cancel() (barge-in) drops every sentence not played yet.
+    """
+
+    def __init__(self, synthesize, play):
+        self.synthesize = synthesize # text -> audio file
+        self.play = play # audio file -> Event set once played (see tts/playback.py), or None when already played
+        self.turn_start = None
+        self.generation = 0 # bumped by cancel(), older sentences are dropped
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue(maxsize=1)
+        threading.Thread(target=self._synth_worker, daemon=True).start()
+        threading.Thread(target=self._play_worker, daemon=True).start()
+
+    def start_turn(self):
+        self.turn_start = time.perf_counter()
+
+    def speak(self, sentence: str):
+        # The workers run on their own threads, the turn ID travels with the sentence
+        self._sentences.put((sentence, get_tracer().current_turn(), self.generation))
+
+    def cancel(self):
+        self.generation += 1
+        self.turn_start = None
+
+    def wait(self):
+        """Blocks until every queued sentence has been played."""
+        self._sentences.join()
+        self._audio.join()
+
+    def _synth_worker(self):
+        while True:
+            sentence, turn_id, generation = self._sentences.get()
+            try:
+                if generation != self.generation:
+                    continue
+                with get_tracer().turn(turn_id):
+                    path = self.synthesize(sentence)
+                self._audio.put((path, turn_id, generation))
+            except Exception as e:
+                print(f"[TTS] Synthesis failed: {e}")
+            finally:
+                self._sentences.task_done()
+
+    def _play_worker(self):
+        while True:
+            path, turn_id, generation = self._audio.get()
+            try:
+                if generation != self.generation:
+                    continue
+                if self.turn_start is not None:
+                    print(f"[TTS] Time to first audio: {time.perf_counter() - self.turn_start:.2f}s")
+                    self.turn_start = None
+                with get_tracer().turn(turn_id):
+                    done = self.play(path)
+                # Waiting keeps the synthesis at most one sentence ahead of playback
+                if done is not None:
+                    done.wait()
+            except Exception as e:
+                print(f"[TTS] Playback failed: {e}")
+            finally:
+                self._audio.task_done()
+
+
+class StreamingSpeechHandler(BaseCallbackHandler):
+    """Callback for a streaming chat model: feeds the tokens into the sentence pipeline."""
+
+    def __init__(self, pipeline: SentencePipeline):
+        self.pipeline = pipeline
+        self.splitter = SentenceSplitter()
+        self.generation = 0
+        self.tokens = 0 # text tokens of the last model call, 0 when the model did not stream
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.splitter.flush()
+        self.generation = self.pipeline.generation
+        self.tokens = 0
+        self.pipeline.start_turn()
+
+    def on_llm_new_token(self, token, **kwargs):
+        if not isinstance(token, str) or not token:
+            return # tool call chunks carry no text
+        self.tokens += 1
+        if self.generation != self.pipeline.generation:
+            return # barge-in while the model was still generating
+        for sentence in self.splitter.feed(token):
+            self.pipeline.speak(sentence)
+
+    def on_llm_end(self, response, **kwargs):
+        tail = self.splitter.flush()
+        if tail and self.generation == self.pipeline.generation:
+            self.pipeline.speak(tail)
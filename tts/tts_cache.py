@@ -0,0 +1,112 @@
+# =======================================================
+# File: tts/tts_cache.py
+# Author: Lorenzo Siena
+# Date: October 2025
+# Description: Content-addressed on-disk cache for synthesized speech with LRU eviction
+# License: GNU General Public License v3.0 (GPLv3)
+# =======================================================
+
+
+from collections import OrderedDict
+from typing import Callable
+import hashlib
+import os
+import threading
+import time
+
+
+class TTSCache:
+    """
+    Stores one audio file per (text, voice), named after the hash of the key.
+    The voice string comes from the TTS backend (e.g. "gtts:en:co.uk"), so it covers lang and tld.
+    When the directory grows past `max_bytes` the least recently played files are removed.
+    The LRU order survives restarts through the file modification time.
+    """
+
+    def __init__(self, directory="tts_cache", max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.synthesis_seconds = 0.0 # time spent synthesizing on misses
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # file name -> size in bytes, least recently used first
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        files = [f for f in os.listdir(directory) if not f.endswith(".tmp")]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+        for f in files:
+            size = os.path.getsize(os.path.join(directory, f))
+            self._entries[f] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def key(text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get_or_synthesize(self, text: str, voice: str, synthesize: Callable[[str], None], extension="mp3") -> str:
+        """Returns the cached file for the text, calling synthesize(path) only on a miss."""
+        key = f"{self.key(text, voice)}.{extension}"
+        path = self.path_for(key)
+
+        with self._lock:
+            if key in self._entries and os.path.exists(path):
+                self.hits += 1
+                self._entries.move_to_end(key)
+                os.utime(path)
+                return path
+
+        start = time.perf_counter()
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        synthesize(tmp_path)
+        os.replace(tmp_path, path) # readers never see a half written file
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += 1
+            self.synthesis_seconds += elapsed
+            size = os.path.getsize(path)
+            self._total_bytes += size - self._entries.get(key, 0)
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep: str):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self._total_bytes -= size
+            try:
+                os.remove(self.path_for(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        """Hit/miss counters and an estimate of the synthesis time saved by the hits."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_synthesis = self.synthesis_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "synthesis_seconds": self.synthesis_seconds,
+                "saved_seconds": self.hits * avg_synthesis,
+            }
+
+
+def load_tts_cache():
+    """Returns the on-disk TTS cache configured in .env, TTS_CACHE_MAX_MB=0 disables it."""
+    max_mb = float(os.getenv("TTS_CACHE_MAX_MB", "50"))
+    if max_mb <= 0:
+        return None
+    return TTSCache(os.getenv("TTS_CACHE_DIR", "tts_cache"), max_bytes=int(max_mb * 1024 * 1024))